@@ -3,6 +3,7 @@ ELLA (English Literacy Learning App) - Backend API
 Main Flask application entry point
 """
 import os
+import threading
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -17,59 +18,102 @@ from routes.speech_routes import speech_bp
 from routes.books_routes import books_bp
 from routes.reading_routes import reading_bp
 from routes.prizes_routes import prizes_bp
+from services.speech_service import speech_service
+from repositories.books import books_repo
+from services.search_index import book_search_index
+from services.book_buckets import book_buckets
+from services.speech_hints import speech_hint_store
+from services.session_reaper import session_reaper
+from utils.token_cache import token_cache
 
-# Initialize Flask app
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size for audio uploads
+def warm_up():
+    """
+    Build the Firebase and Google Speech/TTS clients and the in-memory
+    catalog indexes ahead of the first request. Safe to call more than once.
+    """
+    initialize_firebase()
+    speech_service.warm_up()
+    try:
+        book_search_index.ensure_fresh()
+        book_buckets.ensure_fresh()
+    except Exception as e:
+        print(f"⚠️  Catalog index warm-up failed: {str(e)}")
 
-# Enable CORS for React Native frontend
-CORS(app, resources={
-    r"/api/*": {
-        "origins": "*",  # For development - restrict in production
-        "methods": ["GET", "POST", "PUT", "DELETE"],
-        "allow_headers": ["Content-Type", "Authorization"]
-    }
-})
+def create_app(warm_up_clients=None):
+    """
+    Application factory. Creating the app is cheap: Firebase and the Google
+    clients are built lazily on first use. With WARM_UP_ON_BOOT=true (or
+    warm_up_clients=True) they are built in a background thread instead, so
+    the worker starts serving immediately.
+    """
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size for audio uploads
 
-# Initialize Firebase
-initialize_firebase()
+    # Enable CORS for React Native frontend
+    CORS(app, resources={
+        r"/api/*": {
+            "origins": "*",  # For development - restrict in production
+            "methods": ["GET", "POST", "PUT", "DELETE"],
+            "allow_headers": ["Content-Type", "Authorization"]
+        }
+    })
 
-# Register blueprints (route modules)
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-app.register_blueprint(user_bp, url_prefix='/api/user')
-app.register_blueprint(speech_bp, url_prefix='/api/speech')
-app.register_blueprint(books_bp, url_prefix='/api/books')
-app.register_blueprint(reading_bp, url_prefix='/api/reading')
-app.register_blueprint(prizes_bp, url_prefix='/api/prizes')
+    # Register blueprints (route modules)
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(user_bp, url_prefix='/api/user')
+    app.register_blueprint(speech_bp, url_prefix='/api/speech')
+    app.register_blueprint(books_bp, url_prefix='/api/books')
+    app.register_blueprint(reading_bp, url_prefix='/api/reading')
+    app.register_blueprint(prizes_bp, url_prefix='/api/prizes')
 
-# Root endpoint
-@app.route('/')
-def index():
-    return jsonify({
-        'message': 'ELLA Backend API',
-        'version': '1.0.0',
-        'status': 'running'
-    })
+    # Root endpoint
+    @app.route('/')
+    def index():
+        return jsonify({
+            'message': 'ELLA Backend API',
+            'version': '1.0.0',
+            'status': 'running'
+        })
 
-# Health check endpoint
-@app.route('/api/health')
-def health_check():
-    return jsonify({
-        'status': 'healthy',
-        'firebase': 'connected'
-    })
+    # Health check endpoint
+    @app.route('/api/health')
+    def health_check():
+        return jsonify({
+            'status': 'healthy',
+            'firebase': 'connected',
+            'caches': {
+                'books': books_repo.cache.stats(),
+                'tokens': token_cache.stats(),
+                'speechHints': speech_hint_store.cache.stats()
+            }
+        })
+
+    # Error handlers
+    @app.errorhandler(404)
+    def not_found(error):
+        return jsonify({'error': 'Endpoint not found'}), 404
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        return jsonify({'error': 'Internal server error'}), 500
+
+    if warm_up_clients is None:
+        warm_up_clients = os.getenv('WARM_UP_ON_BOOT', 'false').lower() == 'true'
+    if warm_up_clients:
+        threading.Thread(target=warm_up, name='client-warm-up', daemon=True).start()
 
-# Error handlers
-@app.errorhandler(404)
-def not_found(error):
-    return jsonify({'error': 'Endpoint not found'}), 404
+    # Optional in-process session reaper (seconds between runs; 0 = off)
+    reaper_interval = int(os.getenv('SESSION_REAPER_INTERVAL', 0))
+    if reaper_interval > 0:
+        session_reaper.start(reaper_interval)
 
-@app.errorhandler(500)
-def internal_error(error):
-    return jsonify({'error': 'Internal server error'}), 500
+    return app
 
 if __name__ == '__main__':
+    # Only built here: gunicorn calls the factory itself ('app:create_app()'),
+    # and importing this module must not start a second warm-up or reaper
+    app = create_app()
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('FLASK_ENV', 'development') == 'development'
     
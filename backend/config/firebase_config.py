@@ -4,21 +4,41 @@ Handles Firebase Admin SDK setup for Authentication and Firestore
 """
 
 import firebase_admin
-from firebase_admin import credentials, auth, firestore
+from firebase_admin import credentials, auth
 import os
 import json
+import threading
 
 # Global Firebase instances
 db = None
 firebase_initialized = False
+_init_lock = threading.Lock()
 
 def initialize_firebase():
+    """
+    Initialize the Admin SDK and Firestore client once per process.
+    Runs lazily on first get_db()/verify_token() call, or eagerly from
+    app.warm_up()
+    """
     global db, firebase_initialized
     if firebase_initialized:
         return db
 
+    with _init_lock:
+        if firebase_initialized:
+            return db
+
+        if os.getenv('DATA_BACKEND', 'firestore') == 'memory':
+            return _initialize_memory_backend()
+
+        return _initialize_firestore()
+
+def _initialize_firestore():
+    global db, firebase_initialized
     try:
-        import json
+        # Heavy (gRPC) import deferred until a worker actually needs Firestore
+        from firebase_admin import firestore
+
         # Try JSON string first (for cloud deployment)
         creds_json = os.getenv('FIREBASE_CREDENTIALS_JSON')
         if creds_json:
@@ -41,20 +61,48 @@ def initialize_firebase():
         db = None
         return db
 
+def _initialize_memory_backend():
+    """
+    Offline mode for tests, load tests and profiling: data lives in process
+    memory (optionally seeded from MEMORY_SEED_FILE). Token verification
+    still goes through firebase_admin; point FIREBASE_AUTH_EMULATOR_HOST at
+    an Auth emulator to run without network access.
+    """
+    global db, firebase_initialized
+    from repositories.memory import MemoryClient
+
+    db = MemoryClient()
+    seed_path = os.getenv('MEMORY_SEED_FILE')
+    if seed_path:
+        db.load_file(seed_path)
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(options={
+            'projectId': os.getenv('GOOGLE_CLOUD_PROJECT', 'ella-local')
+        })
+
+    firebase_initialized = True
+    print("✅ Using in-memory data backend")
+    return db
+
 def get_db():
-    """Get Firestore database instance"""
-    global db
+    """Get Firestore database instance, initializing Firebase on first use"""
+    if not firebase_initialized:
+        initialize_firebase()
     if db is None:
         raise Exception("Firebase not initialized. Call initialize_firebase() first.")
     return db
 
-def verify_token(id_token):
+def verify_token(id_token, check_revoked=False):
     """
     Verify Firebase ID token from client
     Returns decoded token if valid, None otherwise
+    With check_revoked, tokens revoked via revoke_refresh_tokens are rejected
+    (costs an extra Auth lookup, which the token cache amortizes)
     """
+    initialize_firebase()
     try:
-        decoded_token = auth.verify_id_token(id_token)
+        decoded_token = auth.verify_id_token(id_token, check_revoked=check_revoked)
         return decoded_token
     except Exception as e:
         print(f"Token verification error: {str(e)}")
@@ -62,6 +110,7 @@ def verify_token(id_token):
 
 def get_user_by_uid(uid):
     """Get user data from Firebase Auth by UID"""
+    initialize_firebase()
     try:
         user = auth.get_user(uid)
         return user
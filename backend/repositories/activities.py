@@ -0,0 +1,22 @@
+"""
+Activities Repository
+Access to the per-user activity log
+"""
+
+from repositories.base import BaseRepository
+
+
+class ActivitiesRepository(BaseRepository):
+    collection_name = 'activities'
+
+    def recent_for_user(self, uid, limit=20):
+        """A user's activity records, newest first"""
+        query = self.collection()\
+            .where('uid', '==', uid)\
+            .order_by('timestamp', direction='DESCENDING')\
+            .limit(limit)
+        return self._stream(query)
+
+
+# Global instance
+activities_repo = ActivitiesRepository()
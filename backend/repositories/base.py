@@ -0,0 +1,132 @@
+"""
+Base Repository
+Shared document access for the collection repositories. Works against the
+Firestore client or the in-memory backend returned by get_db().
+"""
+
+import json
+from config.firebase_config import get_db
+
+# Firestore allows 500 writes and 10 MiB per commit; batches stop short of
+# the byte limit since write_size() is only an estimate
+MAX_BATCH_WRITES = 500
+MAX_BATCH_BYTES = 9 * 1024 * 1024
+
+
+def write_size(ref, data):
+    """Estimated size in bytes of one document write"""
+    body = json.dumps(data, default=str, ensure_ascii=False) if data is not None else ''
+    return len(ref.path) + len(body.encode('utf-8'))
+
+
+class BaseRepository:
+    """
+    One repository per collection. Reads return plain dicts (or None when a
+    document is missing); `id_field`, when set, is filled in with the
+    document id the way the API responses expect.
+    """
+
+    collection_name = None
+    id_field = None
+
+    def collection(self):
+        return get_db().collection(self.collection_name)
+
+    def ref(self, doc_id):
+        return self.collection().document(str(doc_id))
+
+    def new_ref(self):
+        """Reference with a fresh auto-generated id"""
+        return self.collection().document()
+
+    def _to_dict(self, snapshot):
+        if not snapshot.exists:
+            return None
+        data = snapshot.to_dict() or {}
+        if self.id_field:
+            data[self.id_field] = snapshot.id
+        return data
+
+    def _stream(self, query):
+        return [self._to_dict(doc) for doc in query.stream()]
+
+    def get(self, doc_id, fields=None):
+        if fields:
+            snapshot = self.ref(doc_id).get(field_paths=list(fields))
+        else:
+            snapshot = self.ref(doc_id).get()
+        return self._to_dict(snapshot)
+
+    def create(self, data, doc_id=None):
+        """Write a new document and return its id"""
+        ref = self.ref(doc_id) if doc_id else self.new_ref()
+        ref.set(data)
+        return ref.id
+
+    def set(self, doc_id, data, merge=False):
+        self.ref(doc_id).set(data, merge=merge)
+
+    def update(self, doc_id, data):
+        self.ref(doc_id).update(data)
+
+    def delete(self, doc_id):
+        self.ref(doc_id).delete()
+
+    def _groups(self, writes):
+        """
+        (ref, data) sets split, in order, into lists that fit one commit:
+        at most MAX_BATCH_WRITES writes and MAX_BATCH_BYTES estimated bytes
+        """
+        group, group_bytes = [], 0
+        for ref, data in writes:
+            size = write_size(ref, data)
+            if group and (len(group) >= MAX_BATCH_WRITES or group_bytes + size > MAX_BATCH_BYTES):
+                yield group
+                group, group_bytes = [], 0
+            group.append((ref, data))
+            group_bytes += size
+        if group:
+            yield group
+
+    def _batches(self, writes):
+        """(ref, data) sets grouped into write batches that fit one commit (see _groups)"""
+        db = get_db()
+        for group in self._groups(writes):
+            batch = db.batch()
+            for ref, data in group:
+                batch.set(ref, data)
+            yield batch
+
+
+def run_in_transaction(fn, *args, **kwargs):
+    """
+    Run fn(transaction, *args, **kwargs) atomically and return its result.
+    Firestore retries fn when the documents it read change underneath it,
+    so fn must read through the transaction, do all reads before writing,
+    and have no side effects besides the writes it queues.
+    """
+    db = get_db()
+    if hasattr(db, 'run_transaction'):
+        # In-memory backend (see repositories/memory.py)
+        return db.run_transaction(fn, *args, **kwargs)
+
+    from google.cloud.firestore_v1 import transactional
+    return transactional(fn)(db.transaction(), *args, **kwargs)
+
+
+# Server-side field transforms. The Firestore import is deferred to first
+# use so importing the repositories stays cheap (see create_app()).
+
+def increment(amount):
+    from google.cloud.firestore_v1 import Increment
+    return Increment(amount)
+
+
+def maximum(value):
+    from google.cloud.firestore_v1 import Maximum
+    return Maximum(value)
+
+
+def delete_field():
+    from google.cloud.firestore_v1 import DELETE_FIELD
+    return DELETE_FIELD
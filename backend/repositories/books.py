@@ -0,0 +1,257 @@
+"""
+Books Repository
+Access to the books catalog, with a read-through cache for book documents
+"""
+
+import os
+import json
+import hashlib
+from config.firebase_config import get_db
+from repositories.base import BaseRepository, MAX_BATCH_WRITES, MAX_BATCH_BYTES, write_size
+from utils.cache import LRUCache
+
+# Special field path that orders/filters by document id
+DOCUMENT_ID = '__name__'
+
+# Fields the home screen needs for a catalog card (no sentence contents)
+CARD_FIELDS = ['title', 'writer', 'cover', 'difficulty', 'sentenceCount']
+
+
+def _page_id(index):
+    # Zero-padded so page documents list in reading order
+    return f'{index:05d}'
+
+
+def speech_version(speech):
+    """Hash of the sentence texts a book's speech hints were computed from"""
+    texts = json.dumps([hint.get('text') for hint in speech], ensure_ascii=False)
+    return hashlib.sha1(texts.encode('utf-8')).hexdigest()[:16]
+
+
+class BooksRepository(BaseRepository):
+    """
+    Books are effectively immutable once uploaded, so get() is served from
+    an in-process LRU cache. Writes through this repository populate or
+    invalidate it; the TTL bounds staleness for edits made elsewhere
+    (e.g. directly from the app).
+    """
+
+    collection_name = 'books'
+    id_field = 'bookId'
+
+    def __init__(self, cache_size=500, cache_ttl=600, inline_bytes=262144, page_sentences=100):
+        self.cache = LRUCache(cache_size, ttl=cache_ttl)
+        self.inline_bytes = inline_bytes
+        self.page_sentences = page_sentences
+
+    def pages(self, doc_id):
+        """books/<id>/pages: chunks of `page_sentences` sentences"""
+        return self.ref(doc_id).collection('pages')
+
+    def speech_pages(self, doc_id):
+        """books/<id>/speech: per-sentence speech hints, paged like `pages`"""
+        return self.ref(doc_id).collection('speech')
+
+    def speech_page(self, doc_id, page_index):
+        snapshot = self.speech_pages(doc_id).document(_page_id(page_index)).get()
+        return snapshot.to_dict() if snapshot.exists else None
+
+    def _fits_inline(self, contents):
+        size = len(json.dumps(contents, ensure_ascii=False).encode('utf-8'))
+        return size <= self.inline_bytes
+
+    def get(self, doc_id, fields=None):
+        book_id = str(doc_id)
+        cached = self.cache.get(book_id)
+        if cached is None:
+            if fields:
+                # Projected reads are not cached; they'd leave partial entries
+                return super().get(book_id, fields=fields)
+            cached = super().get(book_id)
+            if cached is None:
+                return None
+            self.cache.set(book_id, cached)
+
+        # Shallow copy so handlers can add keys; nested values are shared
+        if fields:
+            return {f: cached[f] for f in list(fields) + [self.id_field] if f in cached}
+        return dict(cached)
+
+    def _plan(self, data, doc_id=None, speech=None):
+        """
+        Writes for a new book as (ref, book data, writes). Contents too large
+        to keep inline go to the pages subcollection instead (the book records
+        pageCount in place of `contents`), and per-sentence `speech` hints go
+        to the speech subcollection; both are split into pages of pageSize
+        sentences. Speech pages and the book share a `speechVersion`. The
+        book document is the last write, so it's never visible without its
+        pages.
+        """
+        ref = self.ref(doc_id) if doc_id else self.new_ref()
+        data = dict(data)
+        size = self.page_sentences
+        chunked = []
+
+        contents = data.get('contents')
+        if contents is not None and not self._fits_inline(contents):
+            del data['contents']
+            data['pageCount'] = (len(contents) + size - 1) // size
+            chunked.append((self.pages(ref.id), 'sentences', contents))
+        if speech:
+            chunked.append((self.speech_pages(ref.id), 'hints', speech))
+            data['speechVersion'] = speech_version(speech)
+        if chunked:
+            data['pageSize'] = size
+
+        writes = []
+        for collection, key, items in chunked:
+            for start in range(0, len(items), size):
+                page = {'start': start, key: items[start:start + size]}
+                if key == 'hints':
+                    page['version'] = data['speechVersion']
+                writes.append((collection.document(_page_id(start // size)), page))
+        writes.append((ref, data))
+        return ref, data, writes
+
+    def _cache_created(self, ref, data):
+        cached = dict(data)
+        cached[self.id_field] = ref.id
+        self.cache.set(ref.id, cached)
+
+    def create(self, data, doc_id=None, speech=None):
+        """Write a new book (see _plan) and return its id"""
+        ref, data, writes = self._plan(data, doc_id=doc_id, speech=speech)
+        for batch in self._batches(writes):
+            batch.commit()
+        self._cache_created(ref, data)
+        return ref.id
+
+    def _commit_groups(self, plans):
+        """
+        Plans grouped so each group commits in one batch: consecutive books
+        whose writes together fit MAX_BATCH_WRITES and MAX_BATCH_BYTES. A
+        book too large for one batch is a group of its own.
+        """
+        group, group_writes, group_bytes = [], 0, 0
+        for plan in plans:
+            writes = plan[2]
+            size = sum(write_size(ref, data) for ref, data in writes)
+            if group and (group_writes + len(writes) > MAX_BATCH_WRITES
+                          or group_bytes + size > MAX_BATCH_BYTES):
+                yield group
+                group, group_writes, group_bytes = [], 0, 0
+            group.append(plan)
+            group_writes += len(writes)
+            group_bytes += size
+        if group:
+            yield group
+
+    def create_many(self, books):
+        """
+        Write several new books, packing whole books into as few batch
+        commits as possible. `books` is a list of (data, speech). Returns one
+        result per book: its id, or the exception that stopped its writes.
+        A failed batch only fails the books in it; the rest are still written.
+        """
+        plans = [self._plan(data, speech=speech) for data, speech in books]
+        outcomes = {}
+        for group in self._commit_groups(plans):
+            writes = [write for _, _, book_writes in group for write in book_writes]
+            try:
+                # Only a single oversized book needs more than one batch; its
+                # document is the last write, so it never shows without pages
+                for batch in self._batches(writes):
+                    batch.commit()
+            except Exception as e:
+                for ref, _, _ in group:
+                    outcomes[ref.id] = e
+                continue
+            for ref, data, _ in group:
+                self._cache_created(ref, data)
+                outcomes[ref.id] = ref.id
+        return [outcomes[ref.id] for ref, _, _ in plans]
+
+    def sentences(self, doc_id, start, end):
+        """
+        Sentences [start, end) of a book as (sentences, sentenceCount), or
+        None if the book doesn't exist. Paged books read only the pages that
+        overlap the window; inline books are sliced from the cached document.
+        """
+        book = self.get(doc_id)
+        if book is None:
+            return None
+
+        if 'pageCount' not in book:
+            contents = book.get('contents', [])
+            return contents[start:end], len(contents)
+
+        total = book.get('sentenceCount', 0)
+        end = min(end, total)
+        if start >= end:
+            return [], total
+
+        size = book['pageSize']
+        first, last = start // size, (end - 1) // size
+        refs = [self.pages(doc_id).document(_page_id(i)) for i in range(first, last + 1)]
+        pages = {snap.id: snap.to_dict() for snap in get_db().get_all(refs) if snap.exists}
+
+        sentences = []
+        for index in range(first, last + 1):
+            sentences.extend(pages.get(_page_id(index), {}).get('sentences', []))
+        offset = start - first * size
+        return sentences[offset:offset + end - start], total
+
+    def set(self, doc_id, data, merge=False):
+        super().set(doc_id, data, merge=merge)
+        self.cache.pop(str(doc_id))
+
+    def update(self, doc_id, data):
+        super().update(doc_id, data)
+        self.cache.pop(str(doc_id))
+
+    def delete(self, doc_id):
+        super().delete(doc_id)
+        self.cache.pop(str(doc_id))
+
+    def _filtered(self, source=None, difficulty=None):
+        query = self.collection()
+        if source:
+            query = query.where('source', '==', source)
+        if difficulty:
+            query = query.where('difficulty', '==', difficulty)
+        return query
+
+    def list(self, source=None, difficulty=None, fields=None):
+        """All books, optionally filtered by source and difficulty"""
+        query = self._filtered(source, difficulty)
+        if fields:
+            query = query.select(fields)
+        return self._stream(query)
+
+    def page(self, page_size, cursor=None, source=None, difficulty=None, fields=None):
+        """
+        One page of books ordered by id. `cursor` is the last bookId of the
+        previous page. Returns (books, next_cursor); next_cursor is None on
+        the last page.
+        """
+        query = self._filtered(source, difficulty).order_by(DOCUMENT_ID)
+        if cursor:
+            query = query.start_after({DOCUMENT_ID: cursor})
+        if fields:
+            query = query.select(fields)
+
+        # Fetch one extra document to learn whether another page exists
+        books = self._stream(query.limit(page_size + 1))
+        if len(books) > page_size:
+            books = books[:page_size]
+            return books, books[-1][self.id_field]
+        return books, None
+
+
+# Global instance
+books_repo = BooksRepository(
+    cache_size=int(os.getenv('BOOK_CACHE_SIZE', 500)),
+    cache_ttl=int(os.getenv('BOOK_CACHE_TTL', 600)),
+    inline_bytes=int(os.getenv('BOOK_INLINE_CONTENTS_BYTES', 262144)),
+    page_sentences=int(os.getenv('BOOK_PAGE_SENTENCES', 100))
+)
@@ -0,0 +1,546 @@
+"""
+In-Memory Firestore Backend
+A dependency-free stand-in for the Firestore client covering the subset the
+repositories use: documents, subcollections, where/order_by/limit/select,
+cursors, field transforms, batched writes and transactions. Used for
+offline tests, benchmarks and profiling (DATA_BACKEND=memory).
+"""
+
+import copy
+import json
+import random
+import re
+import string
+import threading
+from datetime import datetime
+from functools import cmp_to_key
+from google.api_core.exceptions import Conflict, InvalidArgument, NotFound
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.field_path import parse_field_path
+
+DOCUMENT_ID = '__name__'
+MAX_BATCH_WRITES = 500
+MAX_COMMIT_BYTES = 10 * 1024 * 1024
+
+_AUTO_ID_CHARS = string.ascii_letters + string.digits
+_ISO_DATETIME = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}')
+
+
+def _auto_id():
+    return ''.join(random.choice(_AUTO_ID_CHARS) for _ in range(20))
+
+
+def _field_path_str(field_path):
+    """Accept 'a.b', FieldPath objects and FieldPath.document_id()"""
+    if hasattr(field_path, 'to_api_repr'):
+        return field_path.to_api_repr()
+    return field_path
+
+
+def _get_path(data, parts):
+    """Return (found, value) for a split field path"""
+    value = data
+    for part in parts:
+        if not isinstance(value, dict) or part not in value:
+            return False, None
+        value = value[part]
+    return True, value
+
+
+def _type_rank(value):
+    # Firestore's cross-type ordering
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, bytes):
+        return 5
+    if isinstance(value, (list, tuple)):
+        return 8
+    return 9
+
+
+def _compare(a, b):
+    rank_a, rank_b = _type_rank(a), _type_rank(b)
+    if rank_a != rank_b:
+        return -1 if rank_a < rank_b else 1
+    if rank_a == 3:
+        # Mixed naive/aware timestamps compare on their wall-clock value
+        a, b = a.replace(tzinfo=None), b.replace(tzinfo=None)
+    if rank_a == 8:
+        for x, y in zip(a, b):
+            result = _compare(x, y)
+            if result:
+                return result
+        return (len(a) > len(b)) - (len(a) < len(b))
+    if rank_a == 9:
+        return 0
+    return (a > b) - (a < b)
+
+
+def _matches(op, actual, expected):
+    if op == '==':
+        return _compare(actual, expected) == 0 and _type_rank(actual) == _type_rank(expected)
+    if op == '!=':
+        return actual is not None and _compare(actual, expected) != 0
+    if op in ('<', '<=', '>', '>='):
+        # Range filters never match across types
+        if _type_rank(actual) != _type_rank(expected):
+            return False
+        result = _compare(actual, expected)
+        return {'<': result < 0, '<=': result <= 0, '>': result > 0, '>=': result >= 0}[op]
+    if op == 'in':
+        return any(_matches('==', actual, v) for v in expected)
+    if op == 'not-in':
+        return actual is not None and not any(_matches('==', actual, v) for v in expected)
+    if op == 'array_contains':
+        return isinstance(actual, list) and any(_matches('==', v, expected) for v in actual)
+    if op == 'array_contains_any':
+        return isinstance(actual, list) and any(_matches('==', v, e) for v in actual for e in expected)
+    raise InvalidArgument(f'Unsupported filter operator: {op}')
+
+
+def _apply_transform(current, value):
+    if isinstance(value, transforms.Increment):
+        base = current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0
+        return base + value.value
+    if isinstance(value, transforms.Maximum):
+        return value.value if not isinstance(current, (int, float)) else max(current, value.value)
+    if isinstance(value, transforms.Minimum):
+        return value.value if not isinstance(current, (int, float)) else min(current, value.value)
+    if isinstance(value, transforms.ArrayUnion):
+        result = list(current) if isinstance(current, list) else []
+        for item in value.values:
+            if item not in result:
+                result.append(copy.deepcopy(item))
+        return result
+    if isinstance(value, transforms.ArrayRemove):
+        result = list(current) if isinstance(current, list) else []
+        return [item for item in result if item not in value.values]
+    if value is transforms.SERVER_TIMESTAMP:
+        return datetime.now()
+    return copy.deepcopy(value)
+
+
+def _write_path(data, parts, value):
+    target = data
+    for part in parts[:-1]:
+        if not isinstance(target.get(part), dict):
+            target[part] = {}
+        target = target[part]
+
+    if value is transforms.DELETE_FIELD:
+        target.pop(parts[-1], None)
+    else:
+        target[parts[-1]] = _apply_transform(target.get(parts[-1]), value)
+
+
+def _merge_into(target, data):
+    """set(merge=True): nested maps merge, everything else replaces"""
+    for key, value in data.items():
+        if isinstance(value, dict):
+            # Transforms may be nested inside the map
+            if not isinstance(target.get(key), dict):
+                target[key] = {}
+            _merge_into(target[key], value)
+        else:
+            _write_path(target, [key], value)
+
+
+class MemorySnapshot:
+    def __init__(self, reference, data, field_paths=None):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        if data is not None and field_paths:
+            projected = {}
+            for path in field_paths:
+                parts = parse_field_path(_field_path_str(path))
+                found, value = _get_path(data, parts)
+                if found:
+                    _write_path(projected, parts, value)
+            data = projected
+        self._data = data
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+    def get(self, field_path):
+        found, value = _get_path(self._data or {}, parse_field_path(_field_path_str(field_path)))
+        if not found:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+
+class MemoryDocumentReference:
+    def __init__(self, client, collection_path, doc_id):
+        self._client = client
+        self._collection_path = collection_path
+        self.id = doc_id
+        self.path = f'{collection_path}/{doc_id}'
+
+    def __eq__(self, other):
+        return isinstance(other, MemoryDocumentReference) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    @property
+    def parent(self):
+        return MemoryCollectionReference(self._client, self._collection_path)
+
+    def collection(self, collection_id):
+        return MemoryCollectionReference(self._client, f'{self.path}/{collection_id}')
+
+    def _raw(self):
+        return self._client._collections.get(self._collection_path, {}).get(self.id)
+
+    def get(self, field_paths=None, transaction=None):
+        with self._client._lock:
+            return MemorySnapshot(self, copy.deepcopy(self._raw()), field_paths)
+
+    def create(self, document_data):
+        batch = self._client.batch()
+        batch.create(self, document_data)
+        batch.commit()
+
+    def set(self, document_data, merge=False):
+        batch = self._client.batch()
+        batch.set(self, document_data, merge=merge)
+        batch.commit()
+
+    def update(self, field_updates):
+        batch = self._client.batch()
+        batch.update(self, field_updates)
+        batch.commit()
+
+    def delete(self):
+        batch = self._client.batch()
+        batch.delete(self)
+        batch.commit()
+
+
+class MemoryQuery:
+    def __init__(self, client, collection_path, filters=(), orders=(), limit=None,
+                 offset=0, projection=None, start=None, end=None):
+        self._client = client
+        self._collection_path = collection_path
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit
+        self._offset = offset
+        self._projection = projection
+        self._start = start  # (values, before)
+        self._end = end      # (values, before)
+
+    def _copy(self, **changes):
+        params = dict(
+            filters=self._filters, orders=self._orders, limit=self._limit,
+            offset=self._offset, projection=self._projection,
+            start=self._start, end=self._end
+        )
+        params.update(changes)
+        return MemoryQuery(self._client, self._collection_path, **params)
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((_field_path_str(field_path), op_string, value),))
+
+    def order_by(self, field_path, direction='ASCENDING'):
+        return self._copy(orders=self._orders + ((_field_path_str(field_path), direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def offset(self, num_to_skip):
+        return self._copy(offset=num_to_skip)
+
+    def select(self, field_paths):
+        return self._copy(projection=list(field_paths))
+
+    def start_at(self, document_fields_or_snapshot):
+        return self._copy(start=(document_fields_or_snapshot, True))
+
+    def start_after(self, document_fields_or_snapshot):
+        return self._copy(start=(document_fields_or_snapshot, False))
+
+    def end_before(self, document_fields_or_snapshot):
+        return self._copy(end=(document_fields_or_snapshot, True))
+
+    def end_at(self, document_fields_or_snapshot):
+        return self._copy(end=(document_fields_or_snapshot, False))
+
+    def _effective_orders(self):
+        orders = list(self._orders)
+        # Inequality filters imply an order on their field, as in Firestore
+        if not orders:
+            for field, op, _ in self._filters:
+                if op in ('<', '<=', '>', '>=', '!=', 'not-in'):
+                    orders.append((field, 'ASCENDING'))
+                    break
+        if DOCUMENT_ID not in [field for field, _ in orders]:
+            last_direction = orders[-1][1] if orders else 'ASCENDING'
+            orders.append((DOCUMENT_ID, last_direction))
+        return orders
+
+    @staticmethod
+    def _value(doc_id, data, field):
+        if field == DOCUMENT_ID:
+            return True, doc_id
+        return _get_path(data, parse_field_path(field))
+
+    def _cursor_values(self, cursor, orders):
+        if isinstance(cursor, MemorySnapshot):
+            data = cursor._data or {}
+            return [self._value(cursor.id, data, field)[1] for field, _ in orders]
+        if isinstance(cursor, dict):
+            cursor = {_field_path_str(k): v for k, v in cursor.items()}
+            values = []
+            for field, _ in orders:
+                if field not in cursor:
+                    break
+                value = cursor[field]
+                values.append(value.id if isinstance(value, MemoryDocumentReference) else value)
+            return values
+        return list(cursor)
+
+    def _compare_docs(self, orders, a, b):
+        for (field, direction), x, y in zip(orders, a, b):
+            result = _compare(x, y)
+            if result:
+                return -result if direction == 'DESCENDING' else result
+        return 0
+
+    def stream(self, transaction=None):
+        with self._client._lock:
+            documents = list(self._client._collections.get(self._collection_path, {}).items())
+
+        orders = self._effective_orders()
+        rows = []
+        for doc_id, data in documents:
+            if not all(self._filter_matches(doc_id, data, f) for f in self._filters):
+                continue
+            keys = []
+            for field, _ in orders:
+                found, value = self._value(doc_id, data, field)
+                if not found:
+                    # Documents missing an order_by field are excluded
+                    break
+                keys.append(value)
+            else:
+                rows.append((keys, doc_id, data))
+
+        rows.sort(key=cmp_to_key(lambda a, b: self._compare_docs(orders, a[0], b[0])))
+
+        if self._start is not None:
+            values = self._cursor_values(self._start[0], orders)
+            inclusive = self._start[1]
+            rows = [r for r in rows
+                    if (lambda c: c > 0 or (inclusive and c == 0))(
+                        self._compare_docs(orders[:len(values)], r[0][:len(values)], values))]
+        if self._end is not None:
+            values = self._cursor_values(self._end[0], orders)
+            before = self._end[1]
+            rows = [r for r in rows
+                    if (lambda c: c < 0 or (not before and c == 0))(
+                        self._compare_docs(orders[:len(values)], r[0][:len(values)], values))]
+
+        rows = rows[self._offset:]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+
+        collection = MemoryCollectionReference(self._client, self._collection_path)
+        for _, doc_id, data in rows:
+            yield MemorySnapshot(collection.document(doc_id), copy.deepcopy(data), self._projection)
+
+    def get(self, transaction=None):
+        return list(self.stream(transaction=transaction))
+
+    def _filter_matches(self, doc_id, data, flt):
+        field, op, expected = flt
+        found, actual = self._value(doc_id, data, field)
+        if field == DOCUMENT_ID and isinstance(expected, MemoryDocumentReference):
+            expected = expected.id
+        if not found:
+            return False
+        return _matches(op, actual, expected)
+
+
+class MemoryCollectionReference(MemoryQuery):
+    def __init__(self, client, path):
+        super().__init__(client, path)
+        self.path = path
+        self.id = path.rsplit('/', 1)[-1]
+
+    def document(self, document_id=None):
+        return MemoryDocumentReference(self._client, self.path, document_id or _auto_id())
+
+    def add(self, document_data, document_id=None):
+        ref = self.document(document_id)
+        ref.create(document_data)
+        return datetime.now(), ref
+
+    def list_documents(self):
+        with self._client._lock:
+            ids = list(self._client._collections.get(self.path, {}))
+        return [self.document(doc_id) for doc_id in ids]
+
+
+class MemoryWriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def __len__(self):
+        return len(self._writes)
+
+    def create(self, reference, document_data):
+        self._writes.append(('create', reference, copy.copy(document_data), False))
+
+    def set(self, reference, document_data, merge=False):
+        self._writes.append(('set', reference, copy.copy(document_data), merge))
+
+    def update(self, reference, field_updates):
+        self._writes.append(('update', reference, copy.copy(field_updates), False))
+
+    def delete(self, reference):
+        self._writes.append(('delete', reference, None, False))
+
+    def commit(self):
+        if len(self._writes) > MAX_BATCH_WRITES:
+            raise InvalidArgument(f'A batch can contain at most {MAX_BATCH_WRITES} writes')
+        size = sum(len(json.dumps(data, default=str, ensure_ascii=False).encode('utf-8'))
+                   for _, _, data, _ in self._writes if data is not None)
+        if size > MAX_COMMIT_BYTES:
+            raise InvalidArgument('Request payload size exceeds the limit')
+        self._client._apply(self._writes)
+        self._writes = []
+        return []
+
+
+class MemoryTransaction(MemoryWriteBatch):
+    """
+    Buffered writes applied together on commit, like a batch. Run through
+    MemoryClient.run_transaction(), which holds the client lock for the
+    whole function, so transactions are serializable. As in Firestore, all
+    reads must happen before the first write.
+    """
+
+    def _check_read(self):
+        if self._writes:
+            raise ValueError('Attempted read after write in a transaction')
+
+    def get_all(self, references, field_paths=None):
+        self._check_read()
+        return self._client.get_all(references, field_paths=field_paths)
+
+    def get(self, ref_or_query):
+        self._check_read()
+        if isinstance(ref_or_query, MemoryDocumentReference):
+            return iter([ref_or_query.get()])
+        return ref_or_query.stream()
+
+
+class MemoryClient:
+    """Drop-in replacement for firestore.Client backed by plain dicts"""
+
+    def __init__(self):
+        self._collections = {}  # collection path -> {doc_id: data}
+        self._lock = threading.RLock()
+
+    def collection(self, collection_path):
+        return MemoryCollectionReference(self, collection_path)
+
+    def document(self, document_path):
+        collection_path, doc_id = document_path.rsplit('/', 1)
+        return MemoryDocumentReference(self, collection_path, doc_id)
+
+    def batch(self):
+        return MemoryWriteBatch(self)
+
+    def transaction(self):
+        return MemoryTransaction(self)
+
+    def run_transaction(self, fn, *args, **kwargs):
+        """Call fn(transaction, ...) with the client locked, then commit its writes"""
+        with self._lock:
+            transaction = self.transaction()
+            result = fn(transaction, *args, **kwargs)
+            transaction.commit()
+            return result
+
+    def get_all(self, references, field_paths=None, transaction=None):
+        for reference in references:
+            yield reference.get(field_paths=field_paths)
+
+    def _apply(self, writes):
+        with self._lock:
+            # Validate first so a failing batch leaves no partial writes
+            staged = {}
+            for kind, ref, data, merge in writes:
+                path = ref.path
+                current = staged[path] if path in staged else copy.deepcopy(ref._raw())
+                if kind == 'create':
+                    if current is not None:
+                        raise Conflict(f'Document already exists: {path}')
+                    current = {}
+                    _merge_into(current, data)
+                elif kind == 'set':
+                    if merge and current is not None:
+                        _merge_into(current, data)
+                    else:
+                        current = {}
+                        _merge_into(current, data)
+                elif kind == 'update':
+                    if current is None:
+                        raise NotFound(f'No document to update: {path}')
+                    for field_path, value in data.items():
+                        _write_path(current, parse_field_path(_field_path_str(field_path)), value)
+                elif kind == 'delete':
+                    current = None
+                staged[path] = current
+
+            for kind, ref, _, _ in writes:
+                documents = self._collections.setdefault(ref._collection_path, {})
+                data = staged[ref.path]
+                if data is None:
+                    documents.pop(ref.id, None)
+                else:
+                    documents[ref.id] = data
+
+    # ── Seeding / dumping for benchmarks ─────────────────────────────────────
+
+    def load(self, seed):
+        """Load {collection_path: {doc_id: data}}; ISO strings become datetimes"""
+        def revive(value):
+            if isinstance(value, str) and _ISO_DATETIME.match(value):
+                try:
+                    return datetime.fromisoformat(value)
+                except ValueError:
+                    return value
+            if isinstance(value, dict):
+                return {k: revive(v) for k, v in value.items()}
+            if isinstance(value, list):
+                return [revive(v) for v in value]
+            return value
+
+        with self._lock:
+            for collection_path, documents in seed.items():
+                target = self._collections.setdefault(collection_path, {})
+                for doc_id, data in documents.items():
+                    target[doc_id] = revive(data)
+
+    def load_file(self, path):
+        with open(path) as f:
+            self.load(json.load(f))
+
+    def dump(self):
+        with self._lock:
+            return copy.deepcopy(self._collections)
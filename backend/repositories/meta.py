@@ -0,0 +1,23 @@
+"""
+Meta Repository
+Small bookkeeping documents (meta/<name>) such as the catalog version
+"""
+
+from datetime import datetime
+from repositories.base import BaseRepository, increment
+
+
+class MetaRepository(BaseRepository):
+    collection_name = 'meta'
+
+    def get_counter(self, doc_id, field='version'):
+        data = self.get(doc_id, fields=[field])
+        return (data or {}).get(field, 0)
+
+    def bump_counter(self, doc_id, field='version'):
+        """Atomically increment a counter, creating the document if needed"""
+        self.set(doc_id, {field: increment(1), 'updatedAt': datetime.now()}, merge=True)
+
+
+# Global instance
+meta_repo = MetaRepository()
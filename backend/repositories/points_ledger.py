@@ -0,0 +1,22 @@
+"""
+Points Ledger Repository
+Access to points_ledger: one entry per change to a user's points
+"""
+
+from repositories.base import BaseRepository
+
+
+class PointsLedgerRepository(BaseRepository):
+    collection_name = 'points_ledger'
+
+    def recent_for_user(self, uid, limit=20):
+        """A user's ledger entries, newest first"""
+        query = self.collection()\
+            .where('uid', '==', uid)\
+            .order_by('createdAt', direction='DESCENDING')\
+            .limit(limit)
+        return self._stream(query)
+
+
+# Global instance
+points_ledger_repo = PointsLedgerRepository()
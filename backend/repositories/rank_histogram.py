@@ -0,0 +1,70 @@
+"""
+Rank Histogram Repository
+Access to rank_histogram/<shard>: how many users have each range of totalPoints
+"""
+
+import os
+import random
+from config.firebase_config import get_db
+from repositories.base import BaseRepository, increment
+
+# Width of one histogram bucket in totalPoints
+BUCKET_POINTS = 10
+
+
+def bucket_of(total_points):
+    return max(0, int(total_points)) // BUCKET_POINTS
+
+
+class RankHistogramRepository(BaseRepository):
+    """
+    Counts are kept in a `buckets` map ({bucket: users}) spread over
+    `shards` documents. Every move increments one randomly chosen shard, so
+    concurrent point awards don't contend on a single document; readers
+    add the shards up.
+    """
+
+    collection_name = 'rank_histogram'
+
+    def __init__(self, shards=10):
+        self.shards = shards
+
+    def _shard_ref(self):
+        return self.ref(f'shard-{random.randrange(self.shards):02d}')
+
+    def move_write(self, old_points, new_points):
+        """
+        (ref, data) to set with merge=True for a user going from old_points
+        (None for a new user) to new_points, or None if the bucket is the same
+        """
+        buckets = {}
+        if old_points is not None:
+            buckets[str(bucket_of(old_points))] = increment(-1)
+        new_bucket = str(bucket_of(new_points))
+        if new_bucket in buckets:
+            return None
+        buckets[new_bucket] = increment(1)
+        return self._shard_ref(), {'buckets': buckets}
+
+    def totals(self):
+        """Users per bucket over all shards, as {bucket: count}"""
+        counts = {}
+        for snapshot in self.collection().stream():
+            for bucket, count in ((snapshot.to_dict() or {}).get('buckets') or {}).items():
+                counts[int(bucket)] = counts.get(int(bucket), 0) + count
+        return counts
+
+    def replace(self, counts):
+        """Overwrite the whole histogram with `counts` ({bucket: count})"""
+        batch = get_db().batch()
+        for ref in self.collection().list_documents():
+            if ref.id != 'shard-00':
+                batch.delete(ref)
+        batch.set(self.ref('shard-00'), {'buckets': {str(b): c for b, c in counts.items()}})
+        batch.commit()
+
+
+# Global instance
+rank_histogram_repo = RankHistogramRepository(
+    shards=int(os.getenv('RANK_HISTOGRAM_SHARDS', 10))
+)
@@ -0,0 +1,265 @@
+"""
+Reading Sessions Repository
+Access to reading_sessions documents
+"""
+
+import os
+import hashlib
+from datetime import datetime
+from config.firebase_config import get_db
+from repositories.base import BaseRepository, MAX_BATCH_WRITES, increment, delete_field, run_in_transaction
+from utils.cache import LRUCache
+
+# Session fields that never change after /start
+META_FIELDS = ['uid', 'bookId', 'totalSentences']
+
+# Session fields for history lists (everything but the word log)
+SUMMARY_FIELDS = ['bookId', 'startTime', 'lastActivity', 'completedAt', 'endedAt',
+                  'active', 'abandoned', 'currentSentence', 'totalSentences',
+                  'correctCount', 'attemptCount', 'wordCount', 'pointsEarned', 'accuracy']
+
+# Special field path that orders by document id (ties on startTime)
+DOCUMENT_ID = '__name__'
+
+
+class ReadingSessionsRepository(BaseRepository):
+    """
+    Words read in a session are appended to reading_sessions/<id>/words, one
+    document per word, instead of being rewritten into a `wordsRead` array.
+    Sessions created before that keep their array; words_read() returns both.
+    The session document keeps running correctCount/attemptCount totals, so
+    accuracy never needs the word log.
+    """
+
+    collection_name = 'reading_sessions'
+    id_field = 'sessionId'
+
+    def __init__(self, meta_cache_size=1000, meta_cache_ttl=3600):
+        self.meta_cache = LRUCache(meta_cache_size, ttl=meta_cache_ttl)
+
+    def words(self, session_id):
+        return self.ref(session_id).collection('words')
+
+    def get_meta(self, session_id):
+        """uid, bookId and totalSentences of a session (cached), or None"""
+        session_id = str(session_id)
+        meta = self.meta_cache.get(session_id)
+        if meta is None:
+            meta = self.get(session_id, fields=META_FIELDS)
+            if meta is None:
+                return None
+            self.meta_cache.set(session_id, meta)
+        return meta
+
+    def record_words(self, session_id, words, updates=None):
+        """
+        Append word records, bump the session's counters and apply `updates`
+        in one batch. Each word is its own document, so the cost doesn't grow
+        with the session and concurrent requests can't overwrite each other.
+        Words keep their order in `words` through a `seq` number, since they
+        usually share a timestamp.
+        """
+        batch = get_db().batch()
+        words_ref = self.words(session_id)
+        for seq, word in enumerate(words):
+            batch.set(words_ref.document(), {**word, 'seq': seq})
+
+        updates = dict(updates or {})
+        if words:
+            updates['correctCount'] = increment(sum(1 for w in words if w.get('correct')))
+            updates['attemptCount'] = increment(sum(w.get('attempts', 1) for w in words))
+        if updates:
+            batch.update(self.ref(session_id), updates)
+        batch.commit()
+
+    def word_counts(self, session_id, session_data):
+        """
+        (correct words, attempts) for a session. Uses the counters, plus any
+        legacy `wordsRead` array; sessions without counters scan the log.
+        """
+        if 'attemptCount' not in session_data:
+            words = self.words_read(session_id, session_data)
+        else:
+            words = session_data.get('wordsRead') or []
+
+        correct = session_data.get('correctCount', 0) + sum(1 for w in words if w.get('correct', False))
+        attempts = session_data.get('attemptCount', 0) + sum(w.get('attempts', 1) for w in words)
+        return correct, attempts
+
+    def synced_session_id(self, uid, client_session_id):
+        """Stable document id for a client-generated session id"""
+        digest = hashlib.sha1(f'{uid}:{client_session_id}'.encode('utf-8')).hexdigest()
+        return f'sync-{digest[:24]}'
+
+    def write_synced_words(self, session_id, words):
+        """
+        Write the word records of a session uploaded in one piece, in as few
+        batches as possible. Ids are derived from their position, so a
+        re-sent log overwrites rather than duplicates; records left over
+        from a longer earlier upload are deleted. The session document is
+        written separately, in the transaction that checks it.
+        """
+        words_ref = self.words(session_id)
+        writes = [(words_ref.document(f'{i:05d}'), {**word, 'seq': i}) for i, word in enumerate(words)]
+        for batch in self._batches(writes):
+            batch.commit()
+
+        stale = [ref for ref in words_ref.list_documents()
+                 if not ref.id.isdigit() or int(ref.id) >= len(words)]
+        db = get_db()
+        for i in range(0, len(stale), MAX_BATCH_WRITES):
+            batch = db.batch()
+            for ref in stale[i:i + MAX_BATCH_WRITES]:
+                batch.delete(ref)
+            batch.commit()
+
+    def words_read(self, session_id, session_data):
+        """Legacy `wordsRead` entries followed by the word records, oldest first"""
+        records = [doc.to_dict() for doc in self.words(session_id).stream()]
+        records.sort(key=lambda w: (w['timestamp'], w.get('seq', 0)))
+        return list(session_data.get('wordsRead') or []) + records
+
+    def delete(self, doc_id):
+        super().delete(doc_id)
+        self.meta_cache.pop(str(doc_id))
+
+    def page_for_user(self, uid, page_size, cursor=None, fields=None):
+        """
+        One page of a user's sessions, newest first. `cursor` is the
+        nextCursor of the previous page: the last session's startTime and id,
+        so sessions started in the same instant aren't skipped. Returns
+        (sessions, next_cursor); next_cursor is None on the last page.
+        Raises ValueError for a malformed cursor.
+        """
+        query = self.collection()\
+            .where('uid', '==', uid)\
+            .order_by('startTime', direction='DESCENDING')\
+            .order_by(DOCUMENT_ID, direction='DESCENDING')
+        if cursor:
+            start_time, _, session_id = cursor.rpartition('|')
+            if not start_time or not session_id:
+                raise ValueError('Invalid cursor')
+            query = query.start_after({
+                'startTime': datetime.fromisoformat(start_time),
+                DOCUMENT_ID: session_id
+            })
+        if fields:
+            query = query.select(fields)
+
+        # Fetch one extra document to learn whether another page exists
+        sessions = self._stream(query.limit(page_size + 1))
+        if len(sessions) > page_size:
+            sessions = sessions[:page_size]
+            last = sessions[-1]
+            return sessions, f"{last['startTime'].isoformat()}|{last[self.id_field]}"
+        return sessions, None
+
+    def completed_query(self, uid):
+        """Query for a user's inactive sessions: completed and abandoned ones"""
+        return self.collection()\
+            .where('uid', '==', uid)\
+            .where('active', '==', False)
+
+    def idle(self, cutoff, limit):
+        """Active sessions with no activity since `cutoff`, least recent first"""
+        query = self.collection()\
+            .where('active', '==', True)\
+            .where('lastActivity', '<', cutoff)\
+            .order_by('lastActivity')\
+            .limit(limit)
+        return self._stream(query)
+
+    def started_before(self, cutoff, limit, after=None):
+        """
+        Active sessions started before `cutoff`, oldest first, resuming
+        after the startTime `after`. Finds old sessions that never recorded
+        lastActivity, which idle() can't see.
+        """
+        query = self.collection()\
+            .where('active', '==', True)\
+            .where('startTime', '<', cutoff)\
+            .order_by('startTime')
+        if after is not None:
+            query = query.start_after({'startTime': after})
+        return self._stream(query.limit(limit))
+
+    def uncompacted(self, limit):
+        """Abandoned sessions whose word log wasn't fully deleted yet"""
+        query = self.collection()\
+            .where('abandoned', '==', True)\
+            .where('wordsCompacted', '==', False)\
+            .limit(limit)
+        return self._stream(query)
+
+    def _close_idle(self, transaction, session_id, last_activity, ended_at):
+        """
+        Transaction body for close_abandoned. The session and its word log
+        are re-read here, so a word recorded or a completion committed
+        meanwhile makes Firestore retry, and the retry skips the session.
+        """
+        session_ref = self.ref(session_id)
+        session_data = self._to_dict(next(iter(transaction.get_all([session_ref]))))
+        if (session_data is None or not session_data.get('active', True)
+                or session_data.get('lastActivity') != last_activity):
+            return None, []
+
+        words = list(transaction.get(self.words(session_id).select(['correct', 'attempts'])))
+        legacy = session_data.get('wordsRead') or []
+        if not session_data.get('currentSentence', 0) and not legacy and not words:
+            transaction.delete(session_ref)
+            return 'deleted', []
+
+        if 'attemptCount' in session_data:
+            correct, attempts = self.word_counts(session_id, session_data)
+        else:
+            entries = legacy + [snap.to_dict() or {} for snap in words]
+            correct = sum(1 for w in entries if w.get('correct', False))
+            attempts = sum(w.get('attempts', 1) for w in entries)
+
+        transaction.update(session_ref, {
+            'active': False,
+            'abandoned': True,
+            'endedAt': ended_at,
+            'wordCount': len(words) + len(legacy),
+            'correctCount': correct,
+            'attemptCount': attempts,
+            'wordsRead': delete_field(),
+            'wordsCompacted': False
+        })
+        return 'closed', [snap.reference for snap in words]
+
+    def close_abandoned(self, session_id, last_activity, ended_at):
+        """
+        Close an abandoned session if it is still active and its lastActivity
+        is still `last_activity` (as listed by idle()/started_before()).
+        Sessions where nothing was read are deleted; the rest are closed
+        with their word log folded into wordCount/correctCount/attemptCount
+        and the word documents deleted afterwards. Returns ('closed' or
+        'deleted', word count), or (None, 0) if the session changed.
+        """
+        outcome, word_refs = run_in_transaction(self._close_idle, session_id, last_activity, ended_at)
+        if outcome == 'deleted':
+            self.meta_cache.pop(str(session_id))
+        elif outcome == 'closed':
+            self.compact_words(session_id, word_refs)
+        return outcome, len(word_refs)
+
+    def compact_words(self, session_id, word_refs=None):
+        """
+        Delete a closed session's word documents (`word_refs`, or every one
+        left) and mark it compacted. Until then uncompacted() finds it again.
+        """
+        if word_refs is None:
+            word_refs = list(self.words(session_id).list_documents())
+        db = get_db()
+        for i in range(0, len(word_refs), MAX_BATCH_WRITES):
+            batch = db.batch()
+            for ref in word_refs[i:i + MAX_BATCH_WRITES]:
+                batch.delete(ref)
+            batch.commit()
+        self.update(session_id, {'wordsCompacted': True})
+
+# Global instance
+reading_sessions_repo = ReadingSessionsRepository(
+    meta_cache_size=int(os.getenv('SESSION_META_CACHE_SIZE', 1000))
+)
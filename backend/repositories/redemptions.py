@@ -0,0 +1,22 @@
+"""
+Redemptions Repository
+Access to prize redemption records
+"""
+
+from repositories.base import BaseRepository
+
+
+class RedemptionsRepository(BaseRepository):
+    collection_name = 'redemptions'
+
+    def recent_for_user(self, uid, limit=20):
+        """A user's redemptions, newest first"""
+        query = self.collection()\
+            .where('uid', '==', uid)\
+            .order_by('redeemedAt', direction='DESCENDING')\
+            .limit(limit)
+        return self._stream(query)
+
+
+# Global instance
+redemptions_repo = RedemptionsRepository()
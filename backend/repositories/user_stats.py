@@ -0,0 +1,32 @@
+"""
+User Stats Repository
+Access to user_stats/<uid>: running reading totals for one user
+"""
+
+from config.firebase_config import get_db
+from repositories.base import BaseRepository
+
+# Totals kept on every user_stats document
+STATS_FIELDS = ['sessionCount', 'accuracySum', 'booksStarted', 'booksCompleted', 'sentencesRead']
+
+
+class UserStatsRepository(BaseRepository):
+    """
+    One document per user, keyed by uid. It is written only in the
+    transactions that change what it summarizes (see services/user_stats.py),
+    so it never has to be recomputed from the sessions and progress it
+    totals.
+    """
+
+    collection_name = 'user_stats'
+
+    def get_many(self, uids):
+        """Stats documents for several users in one multi-get, as {uid: stats}"""
+        if not uids:
+            return {}
+        snapshots = get_db().get_all([self.ref(uid) for uid in uids])
+        return {snap.id: snap.to_dict() or {} for snap in snapshots if snap.exists}
+
+
+# Global instance
+user_stats_repo = UserStatsRepository()
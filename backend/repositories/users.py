@@ -0,0 +1,24 @@
+"""
+Users Repository
+Access to users/<uid> profile documents
+"""
+
+from repositories.base import BaseRepository
+
+
+class UsersRepository(BaseRepository):
+    collection_name = 'users'
+    id_field = 'uid'
+
+    def top_by_points(self, limit, fields=None):
+        """Users ordered by all-time points, highest first"""
+        query = self.collection()\
+            .order_by('totalPoints', direction='DESCENDING')\
+            .limit(limit)
+        if fields:
+            query = query.select(fields)
+        return self._stream(query)
+
+
+# Global instance
+users_repo = UsersRepository()
@@ -4,8 +4,14 @@ Handles user login, logout, and token verification
 """
 
 from flask import Blueprint, request, jsonify
-from config.firebase_config import verify_token, get_db, get_user_by_uid
+from config.firebase_config import verify_token, get_user_by_uid
+from repositories.users import users_repo
+from repositories.user_stats import user_stats_repo
+from services.rank import rank_index
 from utils.decorators import require_auth
+from utils.token_cache import token_cache
+from utils.user_context import current_user_doc
+from utils.progress import read_progress
 from datetime import datetime
 
 auth_bp = Blueprint('auth', __name__)
@@ -33,11 +39,9 @@ def verify_user_token():
         email = decoded_token.get('email', '')
         
         # Get or create user in Firestore
-        db = get_db()
-        user_ref = db.collection('users').document(uid)
-        user_doc = user_ref.get()
+        existing_user = users_repo.get(uid)
         
-        if not user_doc.exists:
+        if existing_user is None:
             # Create new user document
             user_data = {
                 'uid': uid,
@@ -50,15 +54,16 @@ def verify_user_token():
                 'enrolledCode': None,  # For students
                 'classCode': None,  # For teachers
                 'unlockedStickers': [1],  # Start with first sticker
-                'progress': [],  # Array of {bookId, sentencesRead, totalSentences}
+                'bookProgress': {},  # Map of bookId -> {bookId, sentencesRead, totalSentences, updatedAt}
                 'createdAt': datetime.now(),
                 'lastLogin': datetime.now()
             }
-            user_ref.set(user_data)
+            users_repo.set(uid, user_data)
+            rank_index.record(None, 0)
         else:
             # Update last login
-            user_ref.update({'lastLogin': datetime.now()})
-            user_data = user_doc.to_dict()
+            users_repo.update(uid, {'lastLogin': datetime.now()})
+            user_data = existing_user
         
         return jsonify({
             'success': True,
@@ -73,7 +78,7 @@ def verify_user_token():
                 'enrolledCode': user_data.get('enrolledCode'),
                 'classCode': user_data.get('classCode'),
                 'unlockedStickers': user_data.get('unlockedStickers', [1]),
-                'progress': user_data.get('progress', [])
+                'progress': read_progress(user_data)
             }
         }), 200
         
@@ -107,10 +112,9 @@ def signup():
         uid = decoded_token['uid']
         email = decoded_token.get('email', '')
         
-        # Create/update user profile in Firestore
-        db = get_db()
-        user_ref = db.collection('users').document(uid)
+        previous = users_repo.get(uid, fields=['totalPoints'])
         
+        # Create/update user profile in Firestore
         user_data = {
             'uid': uid,
             'email': email,
@@ -122,12 +126,15 @@ def signup():
             'enrolledCode': enrolled_code,
             'classCode': class_code,
             'unlockedStickers': [1],
-            'progress': [],
+            'bookProgress': {},
             'createdAt': datetime.now(),
             'lastLogin': datetime.now()
         }
         
-        user_ref.set(user_data)
+        users_repo.set(uid, user_data)
+        # Progress starts over, so stats are rebuilt on their next read
+        user_stats_repo.delete(uid)
+        rank_index.record(previous.get('totalPoints', 0) if previous else None, 0)
         
         return jsonify({
             'success': True,
@@ -162,9 +169,10 @@ def logout(current_user):
         uid = current_user['uid']
         
         # Update last activity
-        db = get_db()
-        user_ref = db.collection('users').document(uid)
-        user_ref.update({'lastActivity': datetime.now()})
+        current_user_doc().update({'lastActivity': datetime.now()})
+        
+        # Make this process re-verify the user's tokens from now on
+        token_cache.invalidate_uid(uid)
         
         return jsonify({
             'success': True,
@@ -180,15 +188,15 @@ def logout(current_user):
 def get_current_user(current_user):
     """Get current authenticated user's profile"""
     try:
-        uid = current_user['uid']
-        
-        db = get_db()
-        user_doc = db.collection('users').document(uid).get()
+        user_data = current_user_doc().get()
         
-        if not user_doc.exists:
+        if user_data is None:
             return jsonify({'error': 'User not found'}), 404
         
-        user_data = user_doc.to_dict()
+        # Progress is returned as the familiar list
+        user_data = dict(user_data)
+        user_data['progress'] = read_progress(user_data)
+        user_data.pop('bookProgress', None)
         
         # Remove sensitive data
         if 'createdAt' in user_data:
@@ -4,18 +4,38 @@ Handles book catalog, book details, recommendations, and reading progress
 """
 
 from flask import Blueprint, request, jsonify
-from config.firebase_config import get_db
+from repositories.books import books_repo, CARD_FIELDS
 from utils.decorators import require_auth
+from utils.user_context import current_user_doc
+from utils.progress import PROGRESS_FIELDS, read_progress, is_completed
+from utils.http_cache import make_etag, not_modified, with_etag
+from services.catalog_version import catalog_version
+from services.search_index import book_search_index
+from services.book_buckets import book_buckets, DIFFICULTY_ORDER
+from services.speech_hints import sentence_hints
 from datetime import datetime
+import json
 
 books_bp = Blueprint('books', __name__)
 
-# Difficulty mapping for filtering
-DIFFICULTY_ORDER = {
-    'Beginner': 1,
-    'Intermediate': 2,
-    'Advanced': 3
-}
+# Catalog pagination limits
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Sentence window limits
+DEFAULT_SENTENCE_WINDOW = 10
+MAX_SENTENCE_WINDOW = 100
+
+# Bulk upload: books per request, and books planned per write round
+MAX_BULK_UPLOAD_BOOKS = 500
+BULK_UPLOAD_CHUNK = 100
+
+# Required fields for an uploaded book
+REQUIRED_BOOK_FIELDS = ['title', 'writer', 'difficulty', 'source', 'contents']
+
+# Search result limits
+DEFAULT_SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 200
 
 @books_bp.route('/catalog', methods=['GET'])
 @require_auth
@@ -25,36 +45,51 @@ def get_books_catalog(current_user):
     Query params:
         - source: Filter by source (app, Teacher, user)
         - difficulty: Filter by difficulty (Beginner, Intermediate, Advanced)
+        - view: "cards" to return only title, writer, cover, difficulty, sentenceCount
+        - pageSize: Page size (max 100); enables cursor pagination
+        - cursor: nextCursor from the previous page
+    Without pageSize/cursor the whole (filtered) catalog is returned
+    Supports If-None-Match; the ETag changes whenever a book is uploaded
     """
     try:
-        db = get_db()
-        books_ref = db.collection('books')
+        etag = make_etag('catalog', catalog_version.current(), sorted(request.args.items(multi=True)))
+        cached = not_modified(etag)
+        if cached:
+            return cached
         
         # Get query parameters
         source = request.args.get('source')
         difficulty = request.args.get('difficulty')
+        fields = CARD_FIELDS if request.args.get('view') == 'cards' else None
+        cursor = request.args.get('cursor')
+        page_size = request.args.get('pageSize')
         
-        # Apply filters
-        query = books_ref
-        if source:
-            query = query.where('source', '==', source)
-        if difficulty:
-            query = query.where('difficulty', '==', difficulty)
+        if page_size is None and cursor is None:
+            # Get all books matching the filters
+            books_list = books_repo.list(source=source, difficulty=difficulty, fields=fields)
+            
+            return with_etag(jsonify({
+                'success': True,
+                'books': books_list,
+                'count': len(books_list)
+            }), etag), 200
         
-        # Get all books
-        books_docs = query.stream()
-        books_list = []
+        try:
+            page_size = int(page_size or DEFAULT_PAGE_SIZE)
+        except ValueError:
+            return jsonify({'error': 'pageSize must be a number'}), 400
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
         
-        for doc in books_docs:
-            book_data = doc.to_dict()
-            book_data['bookId'] = doc.id
-            books_list.append(book_data)
+        books_list, next_cursor = books_repo.page(
+            page_size, cursor=cursor, source=source, difficulty=difficulty, fields=fields
+        )
         
-        return jsonify({
+        return with_etag(jsonify({
             'success': True,
             'books': books_list,
-            'count': len(books_list)
-        }), 200
+            'count': len(books_list),
+            'nextCursor': next_cursor
+        }), etag), 200
         
     except Exception as e:
         print(f"Get books error: {str(e)}")
@@ -63,48 +98,93 @@ def get_books_catalog(current_user):
 @books_bp.route('/book/<book_id>', methods=['GET'])
 @require_auth
 def get_book_details(current_user, book_id):
-    """Get detailed information about a specific book"""
+    """Get detailed information about a specific book (supports If-None-Match)"""
     try:
-        db = get_db()
-        book_doc = db.collection('books').document(book_id).get()
+        etag = make_etag('book', book_id, catalog_version.current())
+        cached = not_modified(etag)
+        if cached:
+            return cached
         
-        if not book_doc.exists:
-            return jsonify({'error': 'Book not found'}), 404
+        book_data = books_repo.get(book_id)
         
-        book_data = book_doc.to_dict()
-        book_data['bookId'] = book_doc.id
+        if book_data is None:
+            return jsonify({'error': 'Book not found'}), 404
         
-        return jsonify({
+        return with_etag(jsonify({
             'success': True,
             'book': book_data
-        }), 200
+        }), etag), 200
         
     except Exception as e:
         print(f"Get book details error: {str(e)}")
         return jsonify({'error': 'Failed to get book details'}), 500
 
+@books_bp.route('/book/<book_id>/sentences', methods=['GET'])
+@require_auth
+def get_book_sentences(current_user, book_id):
+    """
+    Get a window of a book's sentences
+    Query params:
+        - from: Index of the first sentence (default 0)
+        - to: Index after the last sentence (default from + 10, at most 100 sentences)
+    Supports If-None-Match
+    """
+    try:
+        try:
+            start = int(request.args.get('from', 0))
+            end = int(request.args.get('to', start + DEFAULT_SENTENCE_WINDOW))
+        except ValueError:
+            return jsonify({'error': 'from and to must be numbers'}), 400
+        if start < 0 or end < start:
+            return jsonify({'error': 'Invalid sentence range'}), 400
+        end = min(end, start + MAX_SENTENCE_WINDOW)
+        
+        etag = make_etag('sentences', book_id, start, end, catalog_version.current())
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        
+        window = books_repo.sentences(book_id, start, end)
+        
+        if window is None:
+            return jsonify({'error': 'Book not found'}), 404
+        
+        sentences, sentence_count = window
+        
+        return with_etag(jsonify({
+            'success': True,
+            'bookId': book_id,
+            'from': start,
+            'to': start + len(sentences),
+            'sentenceCount': sentence_count,
+            'sentences': sentences
+        }), etag), 200
+        
+    except Exception as e:
+        print(f"Get book sentences error: {str(e)}")
+        return jsonify({'error': 'Failed to get book sentences'}), 500
+
 @books_bp.route('/recommended', methods=['GET'])
 @require_auth
 def get_recommended_books(current_user):
     """
     Get recommended books based on user's progress and points
     Returns categorized books: recommended, teacher materials, student uploads, app books
+    Lists come from precomputed in-memory buckets (without sentence contents)
+    Supports If-None-Match; the ETag covers the catalog version and the
+    user's difficulty tier and completed books
     """
     try:
-        uid = current_user['uid']
-        
-        db = get_db()
-        user_doc = db.collection('users').document(uid).get()
+        user_data = current_user_doc().get('points', *PROGRESS_FIELDS)
         
-        if not user_doc.exists:
+        if user_data is None:
             return jsonify({'error': 'User not found'}), 404
         
-        user_data = user_doc.to_dict()
         points = user_data.get('points', 0)
-        progress = user_data.get('progress', [])
+        progress = read_progress(user_data)
         
         # Get completed book IDs
-        completed_book_ids = [p.get('bookId') for p in progress if p.get('sentencesRead', 0) >= p.get('totalSentences', 0)]
+        completed_book_ids = {str(p.get('bookId')) for p in progress if is_completed(p)}
         
         # Determine max difficulty based on points
         max_difficulty = 'Beginner'
@@ -113,46 +193,24 @@ def get_recommended_books(current_user):
         elif points >= 200:
             max_difficulty = 'Intermediate'
         
-        max_difficulty_level = DIFFICULTY_ORDER[max_difficulty]
-        
-        # Get all books
-        all_books = db.collection('books').stream()
+        etag = make_etag('recommended', catalog_version.current(), max_difficulty,
+                         sorted(completed_book_ids))
+        cached = not_modified(etag)
+        if cached:
+            return cached
         
-        recommended = []
-        teacher_materials = []
-        student_uploads = []
-        app_books = []
-        
-        for doc in all_books:
-            book_data = doc.to_dict()
-            book_data['bookId'] = doc.id
-            
-            book_difficulty = book_data.get('difficulty', 'Beginner')
-            book_source = book_data.get('source', 'app')
-            
-            # Categorize books
-            if book_source == 'Teacher':
-                teacher_materials.append(book_data)
-            elif book_source == 'user':
-                student_uploads.append(book_data)
-            elif book_source == 'app':
-                app_books.append(book_data)
-            
-            # Add to recommended if not completed and within difficulty
-            if (doc.id not in completed_book_ids and 
-                DIFFICULTY_ORDER.get(book_difficulty, 1) <= max_difficulty_level):
-                recommended.append(book_data)
+        max_difficulty_level = DIFFICULTY_ORDER[max_difficulty]
         
-        # Limit recommended to top 5
-        recommended = recommended[:5]
+        # Top 5 not-yet-completed books within difficulty
+        recommended = book_buckets.recommended(max_difficulty_level, completed_book_ids)
         
-        return jsonify({
+        return with_etag(jsonify({
             'success': True,
             'recommended': recommended,
-            'teacherMaterials': teacher_materials,
-            'studentUploads': student_uploads,
-            'appBooks': app_books
-        }), 200
+            'teacherMaterials': book_buckets.by_source('Teacher'),
+            'studentUploads': book_buckets.by_source('user'),
+            'appBooks': book_buckets.by_source('app')
+        }), etag), 200
         
     except Exception as e:
         print(f"Get recommended books error: {str(e)}")
@@ -163,16 +221,13 @@ def get_recommended_books(current_user):
 def get_last_unfinished_book(current_user):
     """Get the last book the user was reading but didn't finish"""
     try:
-        uid = current_user['uid']
-        
-        db = get_db()
-        user_doc = db.collection('users').document(uid).get()
+        user_data = current_user_doc().get(*PROGRESS_FIELDS)
         
-        if not user_doc.exists:
+        if user_data is None:
             return jsonify({'error': 'User not found'}), 404
         
-        user_data = user_doc.to_dict()
-        progress = user_data.get('progress', [])
+        # Least to most recently updated
+        progress = read_progress(user_data)
         
         if not progress:
             return jsonify({
@@ -181,7 +236,7 @@ def get_last_unfinished_book(current_user):
             }), 200
         
         # Find unfinished books
-        unfinished = [p for p in progress if p.get('sentencesRead', 0) < p.get('totalSentences', 0)]
+        unfinished = [p for p in progress if not is_completed(p)]
         
         # Get the book ID
         if unfinished:
@@ -191,17 +246,14 @@ def get_last_unfinished_book(current_user):
             book_id = progress[-1].get('bookId')
         
         # Get book details
-        book_doc = db.collection('books').document(str(book_id)).get()
+        book_data = books_repo.get(book_id)
         
-        if not book_doc.exists:
+        if book_data is None:
             return jsonify({
                 'success': True,
                 'book': None
             }), 200
         
-        book_data = book_doc.to_dict()
-        book_data['bookId'] = book_doc.id
-        
         return jsonify({
             'success': True,
             'book': book_data
@@ -211,6 +263,59 @@ def get_last_unfinished_book(current_user):
         print(f"Get last unfinished book error: {str(e)}")
         return jsonify({'error': 'Failed to get last unfinished book'}), 500
 
+def _validate_book(data):
+    """Error message for an invalid upload, or None"""
+    if not isinstance(data, dict):
+        return 'Book must be a JSON object'
+    for field in REQUIRED_BOOK_FIELDS:
+        if field not in data:
+            return f'Missing required field: {field}'
+    if not isinstance(data['contents'], list):
+        return 'contents must be a list of sentences'
+    return None
+
+def _new_book(data, uid, user_role, uploaded_at):
+    """Book document and per-sentence speech hints for a validated upload"""
+    book_data = {
+        'title': data['title'],
+        'writer': data['writer'],
+        'publisher': data.get('publisher', f'{user_role} Upload'),
+        'difficulty': data['difficulty'],
+        'source': data['source'],
+        'contents': data['contents'],
+        'sentenceCount': len(data['contents']),
+        'cover': data.get('cover', 'https://picsum.photos/seed/default/400/250'),
+        'uploadedBy': uid,
+        'uploadedAt': uploaded_at
+    }
+    # Speech hints for every sentence are computed here once
+    speech = [sentence_hints(str(sentence)) for sentence in data['contents']]
+    return book_data, speech
+
+def _ndjson_books(stream):
+    """(book, error) for each non-blank line of an NDJSON body, read line by line"""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line), None
+        except ValueError as e:
+            yield None, f'Invalid JSON: {e}'
+
+def _commit_books(pending, results):
+    """Write pending (index, book_data, speech) uploads; returns the created books"""
+    created = []
+    outcomes = books_repo.create_many([(book_data, speech) for _, book_data, speech in pending])
+    for (index, book_data, _), outcome in zip(pending, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"Bulk upload write error: {str(outcome)}")
+            results.append({'index': index, 'success': False, 'error': 'Failed to save book'})
+        else:
+            results.append({'index': index, 'success': True, 'bookId': outcome})
+            created.append(books_repo.get(outcome))
+    return created
+
 @books_bp.route('/upload', methods=['POST'])
 @require_auth
 def upload_book(current_user):
@@ -232,40 +337,27 @@ def upload_book(current_user):
         data = request.get_json()
         
         # Validate required fields
-        required_fields = ['title', 'writer', 'difficulty', 'source', 'contents']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+        error = _validate_book(data)
+        if error:
+            return jsonify({'error': error}), 400
         
         # Get user info to determine publisher
-        db = get_db()
-        user_doc = db.collection('users').document(uid).get()
+        user_data = current_user_doc().get('role')
         
-        if not user_doc.exists:
+        if user_data is None:
             return jsonify({'error': 'User not found'}), 404
         
-        user_data = user_doc.to_dict()
         user_role = user_data.get('role', 'Student')
         
         # Create book document
-        book_data = {
-            'title': data['title'],
-            'writer': data['writer'],
-            'publisher': data.get('publisher', f'{user_role} Upload'),
-            'difficulty': data['difficulty'],
-            'source': data['source'],
-            'contents': data['contents'],
-            'sentenceCount': len(data['contents']),
-            'cover': data.get('cover', 'https://picsum.photos/seed/default/400/250'),
-            'uploadedBy': uid,
-            'uploadedAt': datetime.now()
-        }
-        
-        # Add to database
-        book_ref = db.collection('books').document()
-        book_ref.set(book_data)
-        
-        book_data['bookId'] = book_ref.id
+        book_data, speech = _new_book(data, uid, user_role, datetime.now())
+        
+        # Add to database (long books are stored in pages, without inline contents)
+        previous_version = catalog_version.current()
+        book_data = books_repo.get(books_repo.create(book_data, speech=speech))
+        new_version = catalog_version.bump()
+        book_search_index.add(book_data, previous_version, new_version)
+        book_buckets.add(book_data, previous_version, new_version)
         
         return jsonify({
             'success': True,
@@ -277,13 +369,91 @@ def upload_book(current_user):
         print(f"Upload book error: {str(e)}")
         return jsonify({'error': 'Failed to upload book'}), 500
 
+@books_bp.route('/upload/batch', methods=['POST'])
+@require_auth
+def upload_books_batch(current_user):
+    """
+    Upload many books in one request (up to 500)
+    Body: newline-delimited JSON (Content-Type: application/x-ndjson) with
+    one book per line in the /upload format, or JSON { "books": [...] }
+    NDJSON bodies are read line by line. Books are validated one at a time
+    and written with batched writes; the response has one result per book
+    """
+    try:
+        uid = current_user['uid']
+        
+        user_data = current_user_doc().get('role')
+        
+        if user_data is None:
+            return jsonify({'error': 'User not found'}), 404
+        
+        user_role = user_data.get('role', 'Student')
+        uploaded_at = datetime.now()
+        
+        if request.mimetype == 'application/x-ndjson':
+            items = _ndjson_books(request.stream)
+        else:
+            data = request.get_json(silent=True) or {}
+            if not isinstance(data, dict):
+                return jsonify({'error': 'Body must be a JSON object with a books list'}), 400
+            books = data.get('books')
+            if not isinstance(books, list):
+                return jsonify({'error': 'books must be a list'}), 400
+            items = ((book, None) for book in books)
+        
+        results = []
+        created = []
+        pending = []
+        previous_version = catalog_version.current()
+        
+        for index, (book, error) in enumerate(items):
+            if index >= MAX_BULK_UPLOAD_BOOKS:
+                # Stop reading: the rest of the body is not parsed
+                results.append({'index': index, 'success': False,
+                                'error': f'At most {MAX_BULK_UPLOAD_BOOKS} books per request; the rest were ignored'})
+                break
+            error = error or _validate_book(book)
+            if error:
+                results.append({'index': index, 'success': False, 'error': error})
+                continue
+            
+            book_data, speech = _new_book(book, uid, user_role, uploaded_at)
+            pending.append((index, book_data, speech))
+            if len(pending) >= BULK_UPLOAD_CHUNK:
+                created.extend(_commit_books(pending, results))
+                pending = []
+        
+        if pending:
+            created.extend(_commit_books(pending, results))
+        
+        if created:
+            new_version = catalog_version.bump()
+            for book_data in created:
+                book_search_index.add(book_data, previous_version, new_version)
+                book_buckets.add(book_data, previous_version, new_version)
+        
+        results.sort(key=lambda r: r['index'])
+        
+        return jsonify({
+            'success': bool(created),
+            'created': len(created),
+            'failed': len(results) - len(created),
+            'results': results
+        }), 201 if created else 400
+        
+    except Exception as e:
+        print(f"Bulk upload error: {str(e)}")
+        return jsonify({'error': 'Failed to upload books'}), 500
+
 @books_bp.route('/search', methods=['GET'])
 @require_auth
 def search_books(current_user):
     """
-    Search books by title or writer
+    Search books by title or writer, served from the in-memory search index
     Query params:
         - q: Search query
+        - limit: Max results (default 50, max 200)
+    Results are ranked (title matches first) and omit sentence contents
     """
     try:
         query = request.args.get('q', '').lower()
@@ -291,18 +461,13 @@ def search_books(current_user):
         if not query:
             return jsonify({'error': 'Search query is required'}), 400
         
-        db = get_db()
-        all_books = db.collection('books').stream()
+        try:
+            limit = int(request.args.get('limit', DEFAULT_SEARCH_LIMIT))
+        except ValueError:
+            return jsonify({'error': 'limit must be a number'}), 400
+        limit = max(1, min(limit, MAX_SEARCH_LIMIT))
         
-        matching_books = []
-        for doc in all_books:
-            book_data = doc.to_dict()
-            title = book_data.get('title', '').lower()
-            writer = book_data.get('writer', '').lower()
-            
-            if query in title or query in writer:
-                book_data['bookId'] = doc.id
-                matching_books.append(book_data)
+        matching_books = book_search_index.search(query, limit=limit)
         
         return jsonify({
             'success': True,
@@ -4,48 +4,33 @@ Handles stickers, prizes, point spending, and reward management
 """
 
 from flask import Blueprint, request, jsonify
-from config.firebase_config import get_db
+from repositories.redemptions import redemptions_repo
+from repositories.points_ledger import points_ledger_repo
+from services.user_stats import user_stats
+from services.leaderboard import leaderboard, MAX_LEADERBOARD
+from services.rank import rank_index
+from services import points_ledger, rewards
+from services.rewards import STICKERS
 from utils.decorators import require_auth
-from datetime import datetime
+from utils.user_context import current_user_doc
 
 prizes_bp = Blueprint('prizes', __name__)
 
-# Default stickers/prizes configuration
-STICKERS = [
-    {'stickerId': 1, 'name': 'Bronze Star', 'pointCost': 0, 'description': 'Welcome sticker!'},
-    {'stickerId': 2, 'name': 'Silver Star', 'pointCost': 100, 'description': 'Read your first book!'},
-    {'stickerId': 3, 'name': 'Gold Star', 'pointCost': 200, 'description': 'Keep reading!'},
-    {'stickerId': 4, 'name': 'Reading Master', 'pointCost': 300, 'description': 'You\'re doing great!'},
-    {'stickerId': 5, 'name': 'Word Wizard', 'pointCost': 400, 'description': 'Amazing progress!'},
-    {'stickerId': 6, 'name': 'Book Champion', 'pointCost': 500, 'description': 'Outstanding reader!'},
-    {'stickerId': 7, 'name': 'Super Reader', 'pointCost': 600, 'description': 'Incredible dedication!'},
-    {'stickerId': 8, 'name': 'Ultimate Scholar', 'pointCost': 700, 'description': 'You\'re a legend!'},
-]
-
 @prizes_bp.route('/stickers', methods=['GET'])
 @require_auth
 def get_all_stickers(current_user):
     """Get all available stickers with unlock status"""
     try:
-        uid = current_user['uid']
-        
-        db = get_db()
-        user_doc = db.collection('users').document(uid).get()
+        user_data = current_user_doc().get('unlockedStickers', 'totalPoints')
         
-        if not user_doc.exists:
+        if user_data is None:
             return jsonify({'error': 'User not found'}), 404
         
-        user_data = user_doc.to_dict()
         unlocked_stickers = user_data.get('unlockedStickers', [1])
         total_points = user_data.get('totalPoints', 0)
         
-        # Add unlock status to each sticker
-        stickers_with_status = []
-        for sticker in STICKERS:
-            sticker_copy = sticker.copy()
-            sticker_copy['unlocked'] = sticker['stickerId'] in unlocked_stickers
-            sticker_copy['canUnlock'] = total_points >= sticker['pointCost']
-            stickers_with_status.append(sticker_copy)
+        # Prebuilt sticker entries with this user's unlock status
+        stickers_with_status = rewards.catalog(unlocked_stickers, total_points)
         
         return jsonify({
             'success': True,
@@ -63,19 +48,15 @@ def get_all_stickers(current_user):
 def get_unlocked_stickers(current_user):
     """Get only the stickers that user has unlocked"""
     try:
-        uid = current_user['uid']
-        
-        db = get_db()
-        user_doc = db.collection('users').document(uid).get()
+        user_data = current_user_doc().get('unlockedStickers')
         
-        if not user_doc.exists:
+        if user_data is None:
             return jsonify({'error': 'User not found'}), 404
         
-        user_data = user_doc.to_dict()
         unlocked_sticker_ids = user_data.get('unlockedStickers', [1])
         
         # Filter stickers to only unlocked ones
-        unlocked_stickers = [s for s in STICKERS if s['stickerId'] in unlocked_sticker_ids]
+        unlocked_stickers = rewards.unlocked(unlocked_sticker_ids)
         
         return jsonify({
             'success': True,
@@ -95,21 +76,17 @@ def unlock_sticker(current_user, sticker_id):
     Note: Stickers auto-unlock based on totalPoints, this is for manual unlock
     """
     try:
-        uid = current_user['uid']
-        
         # Find sticker
-        sticker = next((s for s in STICKERS if s['stickerId'] == sticker_id), None)
+        sticker = rewards.sticker(sticker_id)
         if not sticker:
             return jsonify({'error': 'Sticker not found'}), 404
         
-        db = get_db()
-        user_ref = db.collection('users').document(uid)
-        user_doc = user_ref.get()
+        user_doc = current_user_doc()
+        user_data = user_doc.get('unlockedStickers', 'totalPoints')
         
-        if not user_doc.exists:
+        if user_data is None:
             return jsonify({'error': 'User not found'}), 404
         
-        user_data = user_doc.to_dict()
         unlocked_stickers = user_data.get('unlockedStickers', [1])
         total_points = user_data.get('totalPoints', 0)
         
@@ -130,7 +107,7 @@ def unlock_sticker(current_user, sticker_id):
         
         # Unlock sticker
         unlocked_stickers.append(sticker_id)
-        user_ref.update({
+        user_doc.update({
             'unlockedStickers': unlocked_stickers
         })
         
@@ -161,43 +138,31 @@ def redeem_prize(current_user):
         if not prize_id:
             return jsonify({'error': 'prizeId is required'}), 400
         
-        db = get_db()
-        user_ref = db.collection('users').document(uid)
-        user_doc = user_ref.get()
+        if not isinstance(point_cost, int) or isinstance(point_cost, bool) or point_cost < 0:
+            return jsonify({'error': 'pointCost must be a non-negative number'}), 400
         
-        if not user_doc.exists:
-            return jsonify({'error': 'User not found'}), 404
+        # Balance check, deduction, redemption and ledger entry in one transaction
+        result = points_ledger.redeem(uid, prize_id, point_cost)
         
-        user_data = user_doc.to_dict()
-        current_points = user_data.get('points', 0)
+        if result is None:
+            return jsonify({'error': 'User not found'}), 404
         
         # Check if user has enough points
-        if current_points < point_cost:
+        if not result['redeemed']:
             return jsonify({
                 'error': 'Not enough points',
                 'required': point_cost,
-                'current': current_points
+                'current': result['balance']
             }), 400
         
-        # Deduct points
-        new_points = current_points - point_cost
-        user_ref.update({
-            'points': new_points
-        })
-        
-        # Record redemption
-        redemption_ref = db.collection('redemptions').document()
-        redemption_ref.set({
-            'uid': uid,
-            'prizeId': prize_id,
-            'pointCost': point_cost,
-            'redeemedAt': datetime.now()
-        })
+        new_points = result['balance']
+        current_user_doc().mirror({'points': new_points})
         
         return jsonify({
             'success': True,
             'message': 'Prize redeemed successfully',
-            'newPoints': new_points
+            'newPoints': new_points,
+            'redemptionId': result['redemptionId']
         }), 200
         
     except Exception as e:
@@ -211,19 +176,10 @@ def get_redemption_history(current_user):
     try:
         uid = current_user['uid']
         
-        db = get_db()
-        redemptions = db.collection('redemptions')\
-            .where('uid', '==', uid)\
-            .order_by('redeemedAt', direction='DESCENDING')\
-            .limit(20)\
-            .stream()
-        
-        redemption_list = []
-        for redemption in redemptions:
-            redemption_data = redemption.to_dict()
+        redemption_list = redemptions_repo.recent_for_user(uid, limit=20)
+        for redemption_data in redemption_list:
             if 'redeemedAt' in redemption_data:
                 redemption_data['redeemedAt'] = redemption_data['redeemedAt'].isoformat()
-            redemption_list.append(redemption_data)
         
         return jsonify({
             'success': True,
@@ -235,6 +191,28 @@ def get_redemption_history(current_user):
         print(f"Get redemptions error: {str(e)}")
         return jsonify({'error': 'Failed to get redemptions'}), 500
 
+@prizes_bp.route('/ledger', methods=['GET'])
+@require_auth
+def get_points_ledger(current_user):
+    """Get the user's recent point changes (earned and spent)"""
+    try:
+        uid = current_user['uid']
+        
+        entries = points_ledger_repo.recent_for_user(uid, limit=20)
+        for entry in entries:
+            if 'createdAt' in entry:
+                entry['createdAt'] = entry['createdAt'].isoformat()
+        
+        return jsonify({
+            'success': True,
+            'entries': entries,
+            'count': len(entries)
+        }), 200
+        
+    except Exception as e:
+        print(f"Get points ledger error: {str(e)}")
+        return jsonify({'error': 'Failed to get points ledger'}), 500
+
 @prizes_bp.route('/leaderboard', methods=['GET'])
 @require_auth
 def get_leaderboard(current_user):
@@ -244,39 +222,50 @@ def get_leaderboard(current_user):
         - limit: Number of users to return (default: 10)
     """
     try:
-        limit = int(request.args.get('limit', 10))
-        limit = min(limit, 50)  # Max 50 users
-        
-        db = get_db()
-        users = db.collection('users')\
-            .order_by('totalPoints', direction='DESCENDING')\
-            .limit(limit)\
-            .stream()
-        
-        leaderboard = []
-        rank = 1
-        for user in users:
-            user_data = user.to_dict()
-            leaderboard.append({
-                'rank': rank,
-                'name': user_data.get('name', 'Anonymous'),
-                'character': user_data.get('character', 'owl'),
-                'totalPoints': user_data.get('totalPoints', 0),
-                'booksCompleted': len([p for p in user_data.get('progress', []) 
-                                      if p.get('sentencesRead', 0) >= p.get('totalSentences', 0)])
-            })
-            rank += 1
+        try:
+            limit = int(request.args.get('limit', 10))
+        except ValueError:
+            return jsonify({'error': 'limit must be a number'}), 400
+        limit = max(1, min(limit, MAX_LEADERBOARD))  # 1 to 50 users
+        
+        # Served from the materialized board; no query per request
+        rows = leaderboard.top(limit)
         
         return jsonify({
             'success': True,
-            'leaderboard': leaderboard,
-            'count': len(leaderboard)
+            'leaderboard': rows,
+            'count': len(rows)
         }), 200
         
     except Exception as e:
         print(f"Get leaderboard error: {str(e)}")
         return jsonify({'error': 'Failed to get leaderboard'}), 500
 
+@prizes_bp.route('/rank', methods=['GET'])
+@require_auth
+def get_my_rank(current_user):
+    """
+    Get the current user's position by total points
+    Answered from the rank histogram, so it costs no query over users
+    """
+    try:
+        user_data = current_user_doc().get('totalPoints')
+        
+        if user_data is None:
+            return jsonify({'error': 'User not found'}), 404
+        
+        total_points = user_data.get('totalPoints', 0)
+        
+        return jsonify({
+            'success': True,
+            'totalPoints': total_points,
+            **rank_index.rank(total_points)
+        }), 200
+        
+    except Exception as e:
+        print(f"Get rank error: {str(e)}")
+        return jsonify({'error': 'Failed to get rank'}), 500
+
 @prizes_bp.route('/stats', methods=['GET'])
 @require_auth
 def get_user_stats(current_user):
@@ -284,45 +273,25 @@ def get_user_stats(current_user):
     try:
         uid = current_user['uid']
         
-        db = get_db()
-        user_doc = db.collection('users').document(uid).get()
+        user_data = current_user_doc().get('points', 'totalPoints', 'unlockedStickers')
         
-        if not user_doc.exists:
+        if user_data is None:
             return jsonify({'error': 'User not found'}), 404
         
-        user_data = user_doc.to_dict()
-        progress = user_data.get('progress', [])
-        
-        # Calculate stats
-        total_books_started = len(progress)
-        completed_books = [p for p in progress if p.get('sentencesRead', 0) >= p.get('totalSentences', 0)]
-        total_books_completed = len(completed_books)
-        
-        total_sentences_read = sum(p.get('sentencesRead', 0) for p in progress)
-        
-        # Get reading sessions
-        sessions = db.collection('reading_sessions')\
-            .where('uid', '==', uid)\
-            .where('active', '==', False)\
-            .stream()
-        
-        session_count = 0
-        total_accuracy = 0
-        for session in sessions:
-            session_data = session.to_dict()
-            total_accuracy += session_data.get('accuracy', 0)
-            session_count += 1
+        # Running totals, updated whenever a session completes or progress changes
+        stats = user_stats.get(uid) or {}
         
-        average_accuracy = (total_accuracy / session_count) if session_count > 0 else 0
+        session_count = stats.get('sessionCount', 0)
+        average_accuracy = (stats.get('accuracySum', 0) / session_count) if session_count > 0 else 0
         
         return jsonify({
             'success': True,
             'stats': {
                 'points': user_data.get('points', 0),
                 'totalPoints': user_data.get('totalPoints', 0),
-                'booksStarted': total_books_started,
-                'booksCompleted': total_books_completed,
-                'sentencesRead': total_sentences_read,
+                'booksStarted': stats.get('booksStarted', 0),
+                'booksCompleted': stats.get('booksCompleted', 0),
+                'sentencesRead': stats.get('sentencesRead', 0),
                 'readingSessions': session_count,
                 'averageAccuracy': round(average_accuracy * 100, 2),
                 'unlockedStickers': len(user_data.get('unlockedStickers', [1])),
@@ -4,12 +4,66 @@ Handles sentence-by-sentence reading tracking and word pronunciation evaluation
 """
 
 from flask import Blueprint, request, jsonify
-from config.firebase_config import get_db
+from repositories.books import books_repo
+from repositories.reading_sessions import reading_sessions_repo, SUMMARY_FIELDS
+from repositories.users import users_repo
+from repositories.user_stats import user_stats_repo
+from repositories.base import run_in_transaction, maximum
 from utils.decorators import require_auth
+from utils.user_context import current_user_doc
+from services import user_progress
 from datetime import datetime
 
 reading_bp = Blueprint('reading', __name__)
 
+# Word records per /record-words request; with the session update they
+# must fit in one write batch (500 writes)
+MAX_WORDS_PER_REQUEST = 499
+
+# Word records per /sync request (written in several batches)
+MAX_SYNC_WORDS = 5000
+
+# /sessions/user pagination limits
+DEFAULT_SESSIONS_PAGE_SIZE = 20
+MAX_SESSIONS_PAGE_SIZE = 100
+
+# Session timestamps returned as ISO strings
+SESSION_TIME_FIELDS = ('startTime', 'lastActivity', 'completedAt', 'endedAt')
+
+def _parse_time(value, default):
+    """Client ISO-8601 timestamp as a naive local datetime, or `default`"""
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return default
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone().replace(tzinfo=None)
+        return parsed
+    return default
+
+def _word_records(words, default_time):
+    """Word records for a list of client word results, as (records, error)"""
+    records = []
+    for entry in words:
+        if not isinstance(entry, dict) or not entry.get('word'):
+            return None, 'Every entry in words needs a word'
+        if not isinstance(entry.get('sentenceIndex', 0), int):
+            return None, 'sentenceIndex must be a number'
+        attempts = entry.get('attempts', 1)
+        if not isinstance(attempts, int) or isinstance(attempts, bool) or attempts < 0:
+            return None, 'attempts must be a non-negative number'
+        if not isinstance(entry.get('correct', False), bool):
+            return None, 'correct must be true or false'
+        records.append({
+            'word': entry['word'],
+            'sentenceIndex': entry.get('sentenceIndex', 0),
+            'correct': entry.get('correct', False),
+            'attempts': attempts,
+            'timestamp': _parse_time(entry.get('timestamp'), default_time)
+        })
+    return records, None
+
 @reading_bp.route('/start', methods=['POST'])
 @require_auth
 def start_reading_session(current_user):
@@ -26,26 +80,25 @@ def start_reading_session(current_user):
         if not book_id:
             return jsonify({'error': 'bookId is required'}), 400
         
-        db = get_db()
-        
         # Get book details
-        book_doc = db.collection('books').document(str(book_id)).get()
+        book_data = books_repo.get(book_id)
         
-        if not book_doc.exists:
+        if book_data is None:
             return jsonify({'error': 'Book not found'}), 404
         
-        book_data = book_doc.to_dict()
-        
         # Create reading session
-        session_ref = db.collection('reading_sessions').document()
+        session_ref = reading_sessions_repo.new_ref()
+        now = datetime.now()
         session_data = {
             'sessionId': session_ref.id,
             'uid': uid,
             'bookId': book_id,
-            'startTime': datetime.now(),
+            'startTime': now,
+            'lastActivity': now,
             'currentSentence': 0,
             'totalSentences': book_data.get('sentenceCount', len(book_data.get('contents', []))),
-            'wordsRead': [],
+            'correctCount': 0,
+            'attemptCount': 0,
             'active': True
         }
         session_ref.set(session_data)
@@ -67,18 +120,17 @@ def get_reading_session(current_user, session_id):
     try:
         uid = current_user['uid']
         
-        db = get_db()
-        session_doc = db.collection('reading_sessions').document(session_id).get()
+        session_data = reading_sessions_repo.get(session_id)
         
-        if not session_doc.exists:
+        if session_data is None:
             return jsonify({'error': 'Session not found'}), 404
         
-        session_data = session_doc.to_dict()
-        
         # Verify session belongs to user
         if session_data.get('uid') != uid:
             return jsonify({'error': 'Unauthorized'}), 403
         
+        session_data['wordsRead'] = reading_sessions_repo.words_read(session_id, session_data)
+        
         return jsonify({
             'success': True,
             'session': session_data
@@ -101,41 +153,31 @@ def record_word_read(current_user):
         
         session_id = data.get('sessionId')
         word = data.get('word')
-        sentence_index = data.get('sentenceIndex', 0)
-        correct = data.get('correct', False)
-        attempts = data.get('attempts', 1)
         
         if not session_id or not word:
             return jsonify({'error': 'sessionId and word are required'}), 400
         
-        db = get_db()
-        session_ref = db.collection('reading_sessions').document(session_id)
-        session_doc = session_ref.get()
+        now = datetime.now()
+        records, error = _word_records([{
+            'word': word,
+            'sentenceIndex': data.get('sentenceIndex', 0),
+            'correct': data.get('correct', False),
+            'attempts': data.get('attempts', 1)
+        }], now)
+        if error:
+            return jsonify({'error': error}), 400
         
-        if not session_doc.exists:
-            return jsonify({'error': 'Session not found'}), 404
+        session_meta = reading_sessions_repo.get_meta(session_id)
         
-        session_data = session_doc.to_dict()
+        if session_meta is None:
+            return jsonify({'error': 'Session not found'}), 404
         
         # Verify session belongs to user
-        if session_data.get('uid') != uid:
+        if session_meta.get('uid') != uid:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        # Add word to words read
-        words_read = session_data.get('wordsRead', [])
-        words_read.append({
-            'word': word,
-            'sentenceIndex': sentence_index,
-            'correct': correct,
-            'attempts': attempts,
-            'timestamp': datetime.now()
-        })
-        
-        # Update session
-        session_ref.update({
-            'wordsRead': words_read,
-            'lastActivity': datetime.now()
-        })
+        # Append the word record and touch the session in one batch
+        reading_sessions_repo.record_words(session_id, records, {'lastActivity': now})
         
         return jsonify({
             'success': True,
@@ -146,6 +188,81 @@ def record_word_read(current_user):
         print(f"Record word error: {str(e)}")
         return jsonify({'error': 'Failed to record word'}), 500
 
+@reading_bp.route('/record-words', methods=['POST'])
+@require_auth
+def record_words_read(current_user):
+    """
+    Record the results for a whole sentence (or several) in one request
+    Expected body: {
+        "sessionId": "...",
+        "words": [{ "word": "...", "sentenceIndex": 0, "correct": true, "attempts": 1 }, ...],
+        "currentSentence": 1 (optional, sets the session's current sentence),
+        "advance": true (optional, moves past the highest sentenceIndex in words
+                         unless the session is already further on)
+    }
+    Words and the sentence update are committed in a single batch
+    """
+    try:
+        uid = current_user['uid']
+        data = request.get_json()
+        
+        session_id = data.get('sessionId')
+        words = data.get('words')
+        
+        if not session_id or not isinstance(words, list):
+            return jsonify({'error': 'sessionId and words are required'}), 400
+        
+        if len(words) > MAX_WORDS_PER_REQUEST:
+            return jsonify({'error': f'At most {MAX_WORDS_PER_REQUEST} words per request'}), 400
+        
+        now = datetime.now()
+        records, error = _word_records(words, now)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        session_meta = reading_sessions_repo.get_meta(session_id)
+        
+        if session_meta is None:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        # Verify session belongs to user
+        if session_meta.get('uid') != uid:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        updates = {'lastActivity': now}
+        
+        # Optionally move the session on, replacing /advance-sentence
+        new_sentence = data.get('currentSentence')
+        advance = new_sentence is None and data.get('advance') and records
+        if advance:
+            new_sentence = max(r['sentenceIndex'] for r in records) + 1
+        
+        total_sentences = session_meta.get('totalSentences', 0)
+        if new_sentence is not None:
+            try:
+                new_sentence = max(0, min(int(new_sentence), total_sentences))
+            except (TypeError, ValueError):
+                return jsonify({'error': 'currentSentence must be a number'}), 400
+            # Advancing never moves back, so a late batch can't undo a newer one
+            updates['currentSentence'] = maximum(new_sentence) if advance else new_sentence
+        
+        reading_sessions_repo.record_words(session_id, records, updates)
+        
+        response = {
+            'success': True,
+            'recorded': len(records),
+            'message': 'Words recorded successfully'
+        }
+        if new_sentence is not None:
+            response['currentSentence'] = new_sentence
+            response['completed'] = new_sentence >= total_sentences
+        
+        return jsonify(response), 200
+        
+    except Exception as e:
+        print(f"Record words error: {str(e)}")
+        return jsonify({'error': 'Failed to record words'}), 500
+
 @reading_bp.route('/advance-sentence', methods=['POST'])
 @require_auth
 def advance_sentence(current_user):
@@ -162,15 +279,11 @@ def advance_sentence(current_user):
         if not session_id:
             return jsonify({'error': 'sessionId is required'}), 400
         
-        db = get_db()
-        session_ref = db.collection('reading_sessions').document(session_id)
-        session_doc = session_ref.get()
+        session_data = reading_sessions_repo.get(session_id)
         
-        if not session_doc.exists:
+        if session_data is None:
             return jsonify({'error': 'Session not found'}), 404
         
-        session_data = session_doc.to_dict()
-        
         # Verify session belongs to user
         if session_data.get('uid') != uid:
             return jsonify({'error': 'Unauthorized'}), 403
@@ -181,7 +294,7 @@ def advance_sentence(current_user):
         # Advance to next sentence
         new_sentence = min(current_sentence + 1, total_sentences)
         
-        session_ref.update({
+        reading_sessions_repo.update(session_id, {
             'currentSentence': new_sentence,
             'lastActivity': datetime.now()
         })
@@ -196,12 +309,145 @@ def advance_sentence(current_user):
         print(f"Advance sentence error: {str(e)}")
         return jsonify({'error': 'Failed to advance sentence'}), 500
 
+def _difficulty_multiplier(book_id):
+    """Point multiplier for the book's difficulty (book read from the cache)"""
+    book_data = books_repo.get(book_id) if book_id else None
+    difficulty = book_data.get('difficulty', 'Beginner') if book_data else 'Beginner'
+    if difficulty == 'Intermediate':
+        return 1.5
+    if difficulty == 'Advanced':
+        return 2.0
+    return 1.0
+
+def _read_for_completion(transaction, session_id, uid):
+    """The session, the user and their stats, read in one multi-get"""
+    session_ref = reading_sessions_repo.ref(session_id)
+    user_ref = users_repo.ref(uid)
+    stats_ref = user_stats_repo.ref(uid)
+    snapshots = {snap.reference.path: snap
+                 for snap in transaction.get_all([session_ref, user_ref, stats_ref])}
+    return (reading_sessions_repo._to_dict(snapshots[session_ref.path]),
+            users_repo._to_dict(snapshots[user_ref.path]),
+            user_stats_repo._to_dict(snapshots[stats_ref.path]))
+
+def _completed_result(session_data):
+    """The original award of a session that is already completed, or None"""
+    if session_data.get('active', True) or 'pointsEarned' not in session_data:
+        return None
+    return {
+        'pointsEarned': session_data['pointsEarned'],
+        'accuracy': session_data.get('accuracy', 0),
+        'sentencesRead': session_data.get('currentSentence', 0),
+        'alreadyCompleted': True
+    }
+
+def _award(transaction, session_id, session_data, uid, user_data, stats, difficulty_multiplier):
+    """
+    Score a session and queue the user's updates (see user_progress.record).
+    Returns (session completion fields, result, user updates or None); the
+    caller writes the completion fields to the session.
+    """
+    current_sentence = session_data.get('currentSentence', 0)
+    total_sentences = session_data.get('totalSentences', 1)
+    book_id = session_data.get('bookId')
+    
+    # Calculate accuracy from the running counters
+    correct_words, total_attempts = reading_sessions_repo.word_counts(session_id, session_data)
+    accuracy = correct_words / total_attempts if total_attempts > 0 else 0
+    
+    # Calculate points: base 10 points per sentence * accuracy * difficulty
+    base_points = 10
+    points_earned = int(current_sentence * base_points * accuracy * difficulty_multiplier)
+    
+    completion = {
+        'active': False,
+        'completedAt': datetime.now(),
+        'pointsEarned': points_earned,
+        'accuracy': accuracy
+    }
+    
+    # Update user progress
+    user_updates = None
+    if user_data is not None:
+        user_updates = user_progress.record(
+            transaction, uid, user_data, stats, book_id, current_sentence, total_sentences,
+            points_earned, 'reading', session_accuracy=accuracy, sessionId=session_id
+        )
+    
+    return completion, {
+        'pointsEarned': points_earned,
+        'accuracy': accuracy,
+        'sentencesRead': current_sentence,
+        'alreadyCompleted': False
+    }, user_updates
+
+def _complete_session(transaction, session_id, uid, difficulty_multiplier):
+    """
+    Transaction body for /complete. A session that is already completed is
+    left alone and its original award is returned, so retries can't award
+    points twice; one closed as abandoned gives {'abandoned': True}.
+    Returns (result, user updates or None).
+    """
+    session_data, user_data, stats = _read_for_completion(transaction, session_id, uid)
+    
+    if session_data is None:
+        return None, None
+    
+    # Closed by the session reaper: final, and not counted in the user's stats
+    if session_data.get('abandoned'):
+        return {'abandoned': True}, None
+    
+    done = _completed_result(session_data)
+    if done:
+        return done, None
+    
+    completion, result, user_updates = _award(
+        transaction, session_id, session_data, uid, user_data, stats, difficulty_multiplier
+    )
+    transaction.update(reading_sessions_repo.ref(session_id), completion)
+    return result, user_updates
+
+def _sync_session(transaction, session_id, uid, session_data, completed, difficulty_multiplier,
+                  keep_start_time=False):
+    """
+    Transaction body for /sync: writes the uploaded session document and,
+    if `completed`, completes it in the same commit. A session that was
+    already completed is never rewritten; its original award is returned.
+    One closed as abandoned gives {'abandoned': True}. With
+    `keep_start_time` an existing session keeps its stored startTime.
+    Returns (result or None if not completed, user updates or None).
+    """
+    existing, user_data, stats = _read_for_completion(transaction, session_id, uid)
+    
+    if existing is not None and existing.get('abandoned'):
+        return {'abandoned': True}, None
+    
+    done = _completed_result(existing) if existing is not None else None
+    if done:
+        return done, None
+    
+    if keep_start_time and existing is not None and 'startTime' in existing:
+        session_data = {**session_data, 'startTime': existing['startTime']}
+    
+    session_ref = reading_sessions_repo.ref(session_id)
+    if not completed:
+        transaction.set(session_ref, session_data)
+        return None, None
+    
+    completion, result, user_updates = _award(
+        transaction, session_id, session_data, uid, user_data, stats, difficulty_multiplier
+    )
+    transaction.set(session_ref, {**session_data, **completion})
+    return result, user_updates
+
 @reading_bp.route('/complete', methods=['POST'])
 @require_auth
 def complete_reading_session(current_user):
     """
     Complete a reading session and calculate rewards
     Expected body: { "sessionId": "..." }
+    The session and user updates commit together in one transaction.
+    Completing an already completed session returns the original award.
     """
     try:
         uid = current_user['uid']
@@ -212,106 +458,37 @@ def complete_reading_session(current_user):
         if not session_id:
             return jsonify({'error': 'sessionId is required'}), 400
         
-        db = get_db()
-        session_ref = db.collection('reading_sessions').document(session_id)
-        session_doc = session_ref.get()
+        session_meta = reading_sessions_repo.get_meta(session_id)
         
-        if not session_doc.exists:
+        if session_meta is None:
             return jsonify({'error': 'Session not found'}), 404
         
-        session_data = session_doc.to_dict()
-        
         # Verify session belongs to user
-        if session_data.get('uid') != uid:
+        if session_meta.get('uid') != uid:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        # Calculate points based on performance
-        words_read = session_data.get('wordsRead', [])
-        current_sentence = session_data.get('currentSentence', 0)
-        total_sentences = session_data.get('totalSentences', 1)
-        book_id = session_data.get('bookId')
+        # Get book difficulty for point multiplier
+        difficulty_multiplier = _difficulty_multiplier(session_meta.get('bookId'))
         
-        # Calculate accuracy
-        correct_words = sum(1 for w in words_read if w.get('correct', False))
-        total_attempts = sum(w.get('attempts', 1) for w in words_read)
-        accuracy = correct_words / total_attempts if total_attempts > 0 else 0
+        result, user_updates = run_in_transaction(
+            _complete_session, session_id, uid, difficulty_multiplier
+        )
         
-        # Get book difficulty for point multiplier
-        book_doc = db.collection('books').document(str(book_id)).get()
-        difficulty_multiplier = 1.0
-        if book_doc.exists:
-            book_data = book_doc.to_dict()
-            difficulty = book_data.get('difficulty', 'Beginner')
-            if difficulty == 'Intermediate':
-                difficulty_multiplier = 1.5
-            elif difficulty == 'Advanced':
-                difficulty_multiplier = 2.0
-        
-        # Calculate points: base 10 points per sentence * accuracy * difficulty
-        base_points = 10
-        points_earned = int(current_sentence * base_points * accuracy * difficulty_multiplier)
-        
-        # Update session as completed
-        session_ref.update({
-            'active': False,
-            'completedAt': datetime.now(),
-            'pointsEarned': points_earned,
-            'accuracy': accuracy
-        })
+        if result is None:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        if result.get('abandoned'):
+            return jsonify({'error': 'Session was closed as abandoned'}), 409
+        
+        if user_updates:
+            current_user_doc().mirror(user_updates)
+            user_progress.committed(user_updates, result['pointsEarned'])
         
-        # Update user progress
-        user_ref = db.collection('users').document(uid)
-        user_doc = user_ref.get()
-        
-        if user_doc.exists:
-            user_data = user_doc.to_dict()
-            progress = user_data.get('progress', [])
-            current_points = user_data.get('points', 0)
-            total_points = user_data.get('totalPoints', 0)
-            unlocked_stickers = user_data.get('unlockedStickers', [1])
-            
-            # Update book progress
-            book_progress_found = False
-            for idx, p in enumerate(progress):
-                if str(p.get('bookId')) == str(book_id):
-                    progress[idx] = {
-                        'bookId': book_id,
-                        'sentencesRead': current_sentence,
-                        'totalSentences': total_sentences
-                    }
-                    book_progress_found = True
-                    break
-            
-            if not book_progress_found:
-                progress.append({
-                    'bookId': book_id,
-                    'sentencesRead': current_sentence,
-                    'totalSentences': total_sentences
-                })
-            
-            # Update points
-            new_points = current_points + points_earned
-            new_total_points = total_points + points_earned
-            
-            # Check for new sticker unlocks
-            max_sticker = min(8, (new_total_points // 100) + 1)
-            for i in range(1, max_sticker + 1):
-                if i not in unlocked_stickers:
-                    unlocked_stickers.append(i)
-            
-            user_ref.update({
-                'progress': progress,
-                'points': new_points,
-                'totalPoints': new_total_points,
-                'unlockedStickers': unlocked_stickers,
-                'lastActivity': datetime.now()
-            })
+        points_earned = result['pointsEarned']
         
         return jsonify({
             'success': True,
-            'pointsEarned': points_earned,
-            'accuracy': accuracy,
-            'sentencesRead': current_sentence,
+            **result,
             'message': f'Great job! You earned {points_earned} points!'
         }), 200
         
@@ -319,36 +496,177 @@ def complete_reading_session(current_user):
         print(f"Complete reading session error: {str(e)}")
         return jsonify({'error': 'Failed to complete reading session'}), 500
 
+@reading_bp.route('/sync', methods=['POST'])
+@require_auth
+def sync_reading_session(current_user):
+    """
+    Upload a whole reading session that was recorded offline
+    Expected body: {
+        "clientSessionId": "...",
+        "bookId": "...",
+        "startTime": "2025-11-23T10:00:00" (optional),
+        "words": [{ "word": "...", "sentenceIndex": 0, "correct": true, "attempts": 1, "timestamp": "..." }, ...],
+        "currentSentence": 3 (optional, defaults to past the last word's sentence),
+        "completed": true
+    }
+    Words are written with batched writes, then the session document is
+    written and completed like /complete in one transaction. The same
+    clientSessionId always maps to the same session, so re-sending a log
+    never duplicates words or points
+    """
+    try:
+        uid = current_user['uid']
+        data = request.get_json()
+        
+        client_session_id = data.get('clientSessionId')
+        book_id = data.get('bookId')
+        words = data.get('words', [])
+        
+        if not isinstance(client_session_id, str) or not client_session_id or not book_id:
+            return jsonify({'error': 'clientSessionId and bookId are required'}), 400
+        
+        if not isinstance(words, list):
+            return jsonify({'error': 'words must be a list'}), 400
+        
+        if len(words) > MAX_SYNC_WORDS:
+            return jsonify({'error': f'At most {MAX_SYNC_WORDS} words per session'}), 400
+        
+        session_id = reading_sessions_repo.synced_session_id(uid, client_session_id)
+        
+        # Already synced and completed: report the original result without
+        # rewriting the word log (checked again inside the transaction)
+        existing = reading_sessions_repo.get(
+            session_id, fields=['active', 'abandoned', 'pointsEarned', 'accuracy', 'currentSentence',
+                                'startTime']
+        )
+        if existing is not None and existing.get('abandoned'):
+            return jsonify({'error': 'Session was closed as abandoned'}), 409
+        done = _completed_result(existing) if existing is not None else None
+        if done:
+            return jsonify({
+                'success': True,
+                'sessionId': session_id,
+                'completed': True,
+                'duplicate': True,
+                'pointsEarned': done['pointsEarned'],
+                'accuracy': done['accuracy'],
+                'sentencesRead': done['sentencesRead']
+            }), 200
+        
+        book_data = books_repo.get(book_id)
+        
+        if book_data is None:
+            return jsonify({'error': 'Book not found'}), 404
+        
+        # A re-sync without startTime keeps the one stored on the first sync
+        now = datetime.now()
+        client_start_time = _parse_time(data.get('startTime'), None)
+        start_time = client_start_time or (existing or {}).get('startTime') or now
+        records, error = _word_records(words, start_time)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        total_sentences = book_data.get('sentenceCount', len(book_data.get('contents', [])))
+        current_sentence = data.get('currentSentence')
+        if current_sentence is None:
+            current_sentence = max((r['sentenceIndex'] for r in records), default=-1) + 1
+        try:
+            current_sentence = max(0, min(int(current_sentence), total_sentences))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'currentSentence must be a number'}), 400
+        
+        reading_sessions_repo.write_synced_words(session_id, records)
+        
+        result, user_updates = run_in_transaction(_sync_session, session_id, uid, {
+            'sessionId': session_id,
+            'clientSessionId': client_session_id,
+            'uid': uid,
+            'bookId': book_id,
+            'startTime': start_time,
+            'currentSentence': current_sentence,
+            'totalSentences': total_sentences,
+            'correctCount': sum(1 for r in records if r['correct']),
+            'attemptCount': sum(r['attempts'] for r in records),
+            'active': True,
+            'lastActivity': now
+        }, bool(data.get('completed')), _difficulty_multiplier(book_id),
+           keep_start_time=client_start_time is None)
+        
+        if result is None:
+            return jsonify({
+                'success': True,
+                'sessionId': session_id,
+                'completed': False,
+                'duplicate': False,
+                'currentSentence': current_sentence
+            }), 200
+        
+        if result.get('abandoned'):
+            return jsonify({'error': 'Session was closed as abandoned'}), 409
+        
+        if user_updates:
+            current_user_doc().mirror(user_updates)
+            user_progress.committed(user_updates, result['pointsEarned'])
+        
+        points_earned = result['pointsEarned']
+        
+        return jsonify({
+            'success': True,
+            'sessionId': session_id,
+            'completed': True,
+            'duplicate': result['alreadyCompleted'],
+            'pointsEarned': points_earned,
+            'accuracy': result['accuracy'],
+            'sentencesRead': result['sentencesRead'],
+            'message': f'Great job! You earned {points_earned} points!'
+        }), 200
+        
+    except Exception as e:
+        print(f"Sync reading session error: {str(e)}")
+        return jsonify({'error': 'Failed to sync reading session'}), 500
+
 @reading_bp.route('/sessions/user', methods=['GET'])
 @require_auth
 def get_user_sessions(current_user):
-    """Get all reading sessions for current user"""
+    """
+    Get the current user's reading sessions, newest first, as summaries
+    (no word logs)
+    Query params:
+        - pageSize: Page size (default 20, max 100)
+        - cursor: nextCursor from the previous page
+        - includeWords: a sessionId on this page to return with its wordsRead
+    """
     try:
         uid = current_user['uid']
         
-        db = get_db()
-        sessions = db.collection('reading_sessions')\
-            .where('uid', '==', uid)\
-            .order_by('startTime', direction='DESCENDING')\
-            .limit(20)\
-            .stream()
-        
-        session_list = []
-        for session in sessions:
-            session_data = session.to_dict()
-            session_data['sessionId'] = session.id
-            
+        try:
+            page_size = int(request.args.get('pageSize', DEFAULT_SESSIONS_PAGE_SIZE))
+        except ValueError:
+            return jsonify({'error': 'pageSize must be a number'}), 400
+        page_size = max(1, min(page_size, MAX_SESSIONS_PAGE_SIZE))
+        
+        try:
+            session_list, next_cursor = reading_sessions_repo.page_for_user(
+                uid, page_size, cursor=request.args.get('cursor'), fields=SUMMARY_FIELDS
+            )
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        
+        include_words = request.args.get('includeWords')
+        for session_data in session_list:
+            if session_data['sessionId'] == include_words:
+                full_session = reading_sessions_repo.get(include_words)
+                session_data['wordsRead'] = reading_sessions_repo.words_read(include_words, full_session)
             # Convert timestamps to ISO format
-            if 'startTime' in session_data:
-                session_data['startTime'] = session_data['startTime'].isoformat()
-            if 'completedAt' in session_data:
-                session_data['completedAt'] = session_data['completedAt'].isoformat()
-            
-            session_list.append(session_data)
+            for field in SESSION_TIME_FIELDS:
+                if field in session_data:
+                    session_data[field] = session_data[field].isoformat()
         
         return jsonify({
             'success': True,
-            'sessions': session_list
+            'sessions': session_list,
+            'count': len(session_list),
+            'nextCursor': next_cursor
         }), 200
         
     except Exception as e:
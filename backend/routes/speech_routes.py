@@ -5,6 +5,7 @@ Handles voice recording and pronunciation evaluation
 
 from flask import Blueprint, request, jsonify
 from services.speech_service import speech_service
+from services.speech_hints import speech_hint_store
 from utils.decorators import require_auth
 import base64
 
@@ -14,12 +15,17 @@ speech_bp = Blueprint("speech", __name__)
 @speech_bp.route('/transcribe', methods=['POST'])
 @require_auth
 def transcribe_audio(current_user):
+    """
+    Transcribe a recording. Send either `hints` (the sentence's words) or
+    `bookId` + `sentenceIndex` to use the hints precomputed at upload.
+    """
     try:
         if request.files and 'audio' in request.files:
             audio_file = request.files['audio']
             audio_content = audio_file.read()
             encoding = 'WAV'
             hints = []
+            params = request.form
         else:
             data = request.get_json()
             if not data:
@@ -36,9 +42,23 @@ def transcribe_audio(current_user):
 
             encoding = data.get('encoding', 'WAV')
             hints = data.get('hints', [])  # ← list of words from the sentence
+            params = data
+
+        precomputed = None
+        book_id = params.get('bookId')
+        sentence_index = params.get('sentenceIndex')
+        if book_id is not None and sentence_index is not None:
+            try:
+                sentence_index = int(sentence_index)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'sentenceIndex must be a number'}), 400
+
+            precomputed = speech_hint_store.get(str(book_id), sentence_index)
+            if precomputed is None:
+                return jsonify({'error': 'Sentence not found'}), 404
 
         result = speech_service.transcribe_audio(
-            audio_content, encoding=encoding, hints=hints
+            audio_content, encoding=encoding, hints=hints, sentence_hints=precomputed
         )
 
         if not result:
@@ -4,9 +4,15 @@ Handles user progress, scores, and achievements
 """
 
 from flask import Blueprint, request, jsonify
-from config.firebase_config import get_db
+from repositories.activities import activities_repo
+from repositories.users import users_repo
+from repositories.user_stats import user_stats_repo
+from repositories.base import run_in_transaction
+from services.user_stats import user_stats
+from services import user_progress
 from utils.decorators import require_auth
-from datetime import datetime
+from utils.user_context import current_user_doc
+from utils.progress import PROGRESS_FIELDS, read_progress
 
 user_bp = Blueprint('user', __name__)
 
@@ -15,16 +21,12 @@ user_bp = Blueprint('user', __name__)
 def get_progress(current_user):
     """Get user's learning progress"""
     try:
-        uid = current_user['uid']
-        
-        db = get_db()
-        user_doc = db.collection('users').document(uid).get()
+        user_data = current_user_doc().get(*PROGRESS_FIELDS, 'points', 'totalPoints', 'unlockedStickers')
         
-        if not user_doc.exists:
+        if user_data is None:
             return jsonify({'error': 'User not found'}), 404
         
-        user_data = user_doc.to_dict()
-        progress = user_data.get('progress', [])
+        progress = read_progress(user_data)
         points = user_data.get('points', 0)
         total_points = user_data.get('totalPoints', 0)
         unlocked_stickers = user_data.get('unlockedStickers', [1])
@@ -41,6 +43,40 @@ def get_progress(current_user):
         print(f"Get progress error: {str(e)}")
         return jsonify({'error': 'Failed to get progress'}), 500
 
+def _update_progress(transaction, uid, book_id, sentences_read, total_sentences, points_earned):
+    """
+    Transaction body for POST /progress: reads the user and their stats
+    together and queues their updates (see user_progress.record) and the
+    activity record, so they all commit together. Returns the user updates,
+    or None if the user doesn't exist.
+    """
+    user_ref = users_repo.ref(uid)
+    stats_ref = user_stats_repo.ref(uid)
+    snapshots = {snap.reference.path: snap for snap in transaction.get_all([user_ref, stats_ref])}
+    user_data = users_repo._to_dict(snapshots[user_ref.path])
+    stats = user_stats_repo._to_dict(snapshots[stats_ref.path])
+    
+    if user_data is None:
+        return None
+    
+    user_updates = user_progress.record(
+        transaction, uid, user_data, stats, book_id, sentences_read, total_sentences,
+        points_earned, 'progress'
+    )
+    
+    # Save activity record
+    transaction.set(activities_repo.new_ref(), {
+        'uid': uid,
+        'bookId': book_id,
+        'sentencesRead': sentences_read,
+        'totalSentences': total_sentences,
+        'pointsEarned': points_earned,
+        'completed': sentences_read >= total_sentences,
+        'timestamp': user_updates['lastActivity']
+    })
+    
+    return user_updates
+
 @user_bp.route('/progress', methods=['POST'])
 @require_auth
 def update_progress(current_user):
@@ -60,76 +96,23 @@ def update_progress(current_user):
         if not book_id:
             return jsonify({'error': 'bookId is required'}), 400
         
-        db = get_db()
-        user_ref = db.collection('users').document(uid)
-        user_doc = user_ref.get()
+        user_updates = run_in_transaction(
+            _update_progress, uid, book_id, sentences_read, total_sentences, points_earned
+        )
         
-        if not user_doc.exists:
+        if user_updates is None:
             return jsonify({'error': 'User not found'}), 404
         
-        user_data = user_doc.to_dict()
-        progress = user_data.get('progress', [])
-        current_points = user_data.get('points', 0)
-        current_total_points = user_data.get('totalPoints', 0)
-        unlocked_stickers = user_data.get('unlockedStickers', [1])
-        
-        # Find existing progress for this book
-        book_progress = None
-        for idx, p in enumerate(progress):
-            if str(p.get('bookId')) == str(book_id):
-                book_progress = idx
-                break
-        
-        # Update or create progress entry
-        new_progress_entry = {
-            'bookId': book_id,
-            'sentencesRead': sentences_read,
-            'totalSentences': total_sentences
-        }
-        
-        if book_progress is not None:
-            progress[book_progress] = new_progress_entry
-        else:
-            progress.append(new_progress_entry)
-        
-        # Update points
-        new_points = current_points + points_earned
-        new_total_points = current_total_points + points_earned
-        
-        # Check for new sticker unlocks (every 100 total points unlocks a sticker)
-        max_sticker = min(8, (new_total_points // 100) + 1)
-        for i in range(1, max_sticker + 1):
-            if i not in unlocked_stickers:
-                unlocked_stickers.append(i)
-        
-        # Update in database
-        user_ref.update({
-            'progress': progress,
-            'points': new_points,
-            'totalPoints': new_total_points,
-            'unlockedStickers': unlocked_stickers,
-            'lastActivity': datetime.now()
-        })
-        
-        # Save activity record
-        completed = sentences_read >= total_sentences
-        activity_ref = db.collection('activities').document()
-        activity_ref.set({
-            'uid': uid,
-            'bookId': book_id,
-            'sentencesRead': sentences_read,
-            'totalSentences': total_sentences,
-            'pointsEarned': points_earned,
-            'completed': completed,
-            'timestamp': datetime.now()
-        })
+        user_doc = current_user_doc()
+        user_doc.mirror(user_updates)
+        user_progress.committed(user_updates, points_earned)
         
         return jsonify({
             'success': True,
-            'progress': progress,
-            'points': new_points,
-            'totalPoints': new_total_points,
-            'unlockedStickers': unlocked_stickers,
+            'progress': read_progress(user_doc.get(*PROGRESS_FIELDS)),
+            'points': user_updates['points'],
+            'totalPoints': user_updates['totalPoints'],
+            'unlockedStickers': user_updates['unlockedStickers'],
             'message': 'Progress updated successfully'
         }), 200
         
@@ -142,22 +125,17 @@ def update_progress(current_user):
 def get_achievements(current_user):
     """Get user's achievements and badges"""
     try:
-        uid = current_user['uid']
-        
-        db = get_db()
-        user_doc = db.collection('users').document(uid).get()
+        user_data = current_user_doc().get('unlockedStickers', 'totalPoints', 'points')
         
-        if not user_doc.exists:
+        if user_data is None:
             return jsonify({'error': 'User not found'}), 404
         
-        user_data = user_doc.to_dict()
-        progress = user_data.get('progress', [])
         unlocked_stickers = user_data.get('unlockedStickers', [1])
         total_points = user_data.get('totalPoints', 0)
         current_points = user_data.get('points', 0)
         
-        # Calculate completed books
-        completed_books = [p for p in progress if p.get('sentencesRead', 0) >= p.get('totalSentences', 0)]
+        # Completed books are counted in the user's stats document
+        stats = user_stats.get(current_user['uid']) or {}
         
         return jsonify({
             'success': True,
@@ -165,7 +143,7 @@ def get_achievements(current_user):
                 'unlockedStickers': unlocked_stickers,
                 'totalPoints': total_points,
                 'currentPoints': current_points,
-                'booksCompleted': len(completed_books)
+                'booksCompleted': stats.get('booksCompleted', 0)
             }
         }), 200
         
@@ -181,7 +159,6 @@ def update_profile(current_user):
     Expected body: { "name": "...", "character": "...", "enrolledCode": "..." }
     """
     try:
-        uid = current_user['uid']
         data = request.get_json()
         
         name = data.get('name')
@@ -189,9 +166,6 @@ def update_profile(current_user):
         enrolled_code = data.get('enrolledCode')
         class_code = data.get('classCode')
         
-        db = get_db()
-        user_ref = db.collection('users').document(uid)
-        
         update_data = {}
         if name:
             update_data['name'] = name
@@ -203,7 +177,7 @@ def update_profile(current_user):
             update_data['classCode'] = class_code
         
         if update_data:
-            user_ref.update(update_data)
+            current_user_doc().update(update_data)
         
         return jsonify({
             'success': True,
@@ -221,19 +195,10 @@ def get_activity_history(current_user):
     try:
         uid = current_user['uid']
         
-        db = get_db()
-        activities = db.collection('activities')\
-            .where('uid', '==', uid)\
-            .order_by('timestamp', direction='DESCENDING')\
-            .limit(20)\
-            .stream()
-        
-        activity_list = []
-        for activity in activities:
-            activity_data = activity.to_dict()
+        activity_list = activities_repo.recent_for_user(uid, limit=20)
+        for activity_data in activity_list:
             if 'timestamp' in activity_data:
                 activity_data['timestamp'] = activity_data['timestamp'].isoformat()
-            activity_list.append(activity_data)
         
         return jsonify({
             'success': True,
@@ -0,0 +1,123 @@
+"""
+Book Buckets
+Precomputed per-source and per-difficulty book lists for /api/books/recommended
+"""
+
+import bisect
+import heapq
+import os
+import threading
+import time
+from repositories.books import books_repo
+from services.catalog_version import catalog_version
+
+# Difficulty mapping for filtering
+DIFFICULTY_ORDER = {
+    'Beginner': 1,
+    'Intermediate': 2,
+    'Advanced': 3
+}
+
+RECOMMENDED_LIMIT = 5
+
+# Everything a recommendation card needs; sentence contents stay in Firestore
+BUCKET_FIELDS = ['title', 'writer', 'publisher', 'difficulty', 'source',
+                 'sentenceCount', 'cover', 'uploadedBy', 'uploadedAt']
+
+
+class BookBuckets:
+    """
+    Catalog split into lists by source and by difficulty level, each kept
+    in bookId order (the order a full collection scan returns). Follows the
+    catalog version like the search index: uploads are inserted in place,
+    changes from other workers trigger a rebuild, and books the app writes
+    directly are picked up by a rebuild every `max_age` seconds.
+    """
+
+    def __init__(self, max_age=600):
+        self.max_age = max_age
+        self._by_source = {}      # source -> [(bookId, book)]
+        self._by_difficulty = {}  # level -> [(bookId, book)]
+        self._version = None
+        self._built_at = 0
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+
+    def _insert(self, book):
+        book = {k: v for k, v in book.items() if k != 'contents'}
+        entry = (book['bookId'], book)
+        source = book.get('source', 'app')
+        level = DIFFICULTY_ORDER.get(book.get('difficulty', 'Beginner'), 1)
+        for buckets, key in ((self._by_source, source), (self._by_difficulty, level)):
+            bucket = buckets.setdefault(key, [])
+            index = bisect.bisect_left(bucket, entry[0], key=lambda e: e[0])
+            if index < len(bucket) and bucket[index][0] == entry[0]:
+                bucket[index] = entry
+            else:
+                bucket.insert(index, entry)
+
+    def rebuild(self):
+        version = catalog_version.current()
+        books = books_repo.list(fields=BUCKET_FIELDS)
+        with self._lock:
+            self._by_source = {}
+            self._by_difficulty = {}
+            for book in books:
+                self._insert(book)
+            self._version = version
+            self._built_at = time.time()
+
+    def _stale(self):
+        return (self._version != catalog_version.current()
+                or time.time() - self._built_at >= self.max_age)
+
+    def ensure_fresh(self):
+        """Rebuild if stale, as BookSearchIndex.ensure_fresh does"""
+        if not self._stale():
+            return
+        if self._version is None:
+            with self._rebuild_lock:
+                if self._stale():
+                    self.rebuild()
+        elif self._rebuild_lock.acquire(blocking=False):
+            # One request rebuilds; the others keep reading the current buckets
+            try:
+                if self._stale():
+                    self.rebuild()
+            except Exception as e:
+                print(f"Book buckets rebuild error: {str(e)}")
+            finally:
+                self._rebuild_lock.release()
+
+    def add(self, book, previous_version, new_version):
+        """Insert a freshly uploaded book (see BookSearchIndex.add)"""
+        with self._lock:
+            if self._version is None:
+                return
+            self._insert(book)
+            if self._version == previous_version and new_version == previous_version + 1:
+                self._version = new_version
+
+    def by_source(self, source):
+        self.ensure_fresh()
+        with self._lock:
+            return [book for _, book in self._by_source.get(source, [])]
+
+    def recommended(self, max_level, completed_ids, limit=RECOMMENDED_LIMIT):
+        """First `limit` books at or below max_level that aren't completed"""
+        self.ensure_fresh()
+        result = []
+        with self._lock:
+            eligible = [self._by_difficulty.get(level, []) for level in range(1, max_level + 1)]
+            for book_id, book in heapq.merge(*eligible, key=lambda e: e[0]):
+                if book_id not in completed_ids:
+                    result.append(book)
+                    if len(result) >= limit:
+                        break
+        return result
+
+
+# Global instance
+book_buckets = BookBuckets(
+    max_age=int(os.getenv('CATALOG_INDEX_MAX_AGE', 600))
+)
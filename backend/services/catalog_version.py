@@ -0,0 +1,55 @@
+"""
+Catalog Version Service
+Version number for the book catalog, bumped whenever books are uploaded.
+Used to build ETags and to tell in-memory catalog indexes to refresh.
+"""
+
+import os
+import threading
+import time
+from repositories.meta import meta_repo
+
+
+class CatalogVersion:
+    """
+    The version lives in meta/catalog so every worker sees uploads made by
+    the others. Each worker re-reads it at most every `refresh_interval`
+    seconds, so a conditional GET normally costs no Firestore read.
+    """
+
+    DOC_ID = 'catalog'
+
+    def __init__(self, refresh_interval=30):
+        self.refresh_interval = refresh_interval
+        self._version = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+
+    def current(self):
+        if self._version is None or time.time() - self._checked_at >= self.refresh_interval:
+            with self._lock:
+                if self._version is None or time.time() - self._checked_at >= self.refresh_interval:
+                    self._refresh()
+        return self._version
+
+    def _refresh(self):
+        try:
+            self._version = meta_repo.get_counter(self.DOC_ID)
+        except Exception as e:
+            print(f"Catalog version read error: {str(e)}")
+            if self._version is None:
+                self._version = 0
+        self._checked_at = time.time()
+
+    def bump(self):
+        """Record a catalog change and return the new version"""
+        meta_repo.bump_counter(self.DOC_ID)
+        with self._lock:
+            self._refresh()
+        return self._version
+
+
+# Global instance
+catalog_version = CatalogVersion(
+    refresh_interval=int(os.getenv('CATALOG_VERSION_REFRESH', 30))
+)
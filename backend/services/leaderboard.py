@@ -0,0 +1,97 @@
+"""
+Leaderboard
+Materialized top-N users by total points for /api/prizes/leaderboard
+"""
+
+import os
+import threading
+import time
+from repositories.users import users_repo
+from services.user_stats import user_stats
+
+# Largest leaderboard the API serves
+MAX_LEADERBOARD = 50
+
+# User fields a leaderboard row needs
+LEADERBOARD_FIELDS = ['name', 'character', 'totalPoints']
+
+
+class Leaderboard:
+    """
+    The top MAX_LEADERBOARD users with their completed-book counts, built
+    with one ordered query and one stats multi-get and then served from
+    memory. It is rebuilt at most every `refresh_interval` seconds, or
+    sooner when this worker sees a user's totalPoints change enough to
+    reach the board. Changes made through other workers show up within
+    `refresh_interval`.
+    """
+
+    def __init__(self, refresh_interval=60):
+        self.refresh_interval = refresh_interval
+        self._rows = None
+        self._built_at = 0
+        self._stale = False
+        self._lock = threading.Lock()
+
+    def _needs_refresh(self):
+        return (self._rows is None or self._stale
+                or time.time() - self._built_at >= self.refresh_interval)
+
+    def _build(self):
+        users = users_repo.top_by_points(MAX_LEADERBOARD, fields=LEADERBOARD_FIELDS)
+        stats = user_stats.get_many([user_data['uid'] for user_data in users])
+
+        rows = []
+        for rank, user_data in enumerate(users, start=1):
+            rows.append({
+                'rank': rank,
+                'name': user_data.get('name', 'Anonymous'),
+                'character': user_data.get('character', 'owl'),
+                'totalPoints': user_data.get('totalPoints', 0),
+                'booksCompleted': stats.get(user_data['uid'], {}).get('booksCompleted', 0)
+            })
+        return rows
+
+    def _refresh(self):
+        # Caller holds the lock. A change reported while building marks the
+        # new board stale again.
+        self._stale = False
+        self._rows = self._build()
+        self._built_at = time.time()
+
+    def top(self, limit):
+        """The first `limit` rows (copies, so callers can't edit the board)"""
+        if self._needs_refresh():
+            if self._rows is None:
+                with self._lock:
+                    if self._rows is None:
+                        self._refresh()
+            elif self._lock.acquire(blocking=False):
+                # One request rebuilds; the others keep serving the current board
+                try:
+                    if self._needs_refresh():
+                        self._refresh()
+                except Exception as e:
+                    # Keep serving the old board and retry on the next read
+                    self._stale = True
+                    print(f"Leaderboard refresh error: {str(e)}")
+                finally:
+                    self._lock.release()
+        return [dict(row) for row in self._rows[:limit]]
+
+    def points_changed(self, total_points):
+        """
+        Note a user's new totalPoints. The board is only rebuilt early if
+        that total can place on it.
+        """
+        rows = self._rows
+        if rows is None:
+            return
+        if len(rows) < MAX_LEADERBOARD or total_points >= rows[-1]['totalPoints']:
+            self._stale = True
+
+
+# Global instance
+leaderboard = Leaderboard(
+    refresh_interval=int(os.getenv('LEADERBOARD_REFRESH', 60))
+)
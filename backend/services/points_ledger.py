@@ -0,0 +1,75 @@
+"""
+Points Ledger
+Every change to a user's points goes through here: the balance moves by a
+server-side Increment and a points_ledger entry is written in the same commit
+"""
+
+from datetime import datetime
+from repositories.base import increment, run_in_transaction
+from repositories.points_ledger import points_ledger_repo
+from repositories.redemptions import redemptions_repo
+from repositories.users import users_repo
+
+
+def _entry(transaction, uid, amount, reason, balance, total_points, details):
+    transaction.set(points_ledger_repo.new_ref(), {
+        'uid': uid,
+        'amount': amount,
+        'reason': reason,
+        'balance': balance,
+        'totalPoints': total_points,
+        **details,
+        'createdAt': datetime.now()
+    })
+
+
+def credit(transaction, uid, user_data, amount, reason, **details):
+    """
+    Queue a ledger entry for `amount` earned points and return the user
+    field updates that apply it; merge them into the transaction's update
+    of the user. `user_data` is the user as read in the transaction and is
+    only used to record the resulting balance.
+    """
+    balance = user_data.get('points', 0) + amount
+    total_points = user_data.get('totalPoints', 0) + amount
+    if amount:
+        _entry(transaction, uid, amount, reason, balance, total_points, details)
+    return {
+        'points': increment(amount),
+        'totalPoints': increment(amount)
+    }
+
+
+def _redeem(transaction, uid, prize_id, point_cost):
+    user_ref = users_repo.ref(uid)
+    user_data = users_repo._to_dict(next(iter(transaction.get_all([user_ref]))))
+    if user_data is None:
+        return None
+
+    balance = user_data.get('points', 0)
+    if balance < point_cost:
+        return {'redeemed': False, 'balance': balance}
+
+    now = datetime.now()
+    redemption_ref = redemptions_repo.new_ref()
+    transaction.update(user_ref, {'points': increment(-point_cost)})
+    transaction.set(redemption_ref, {
+        'uid': uid,
+        'prizeId': prize_id,
+        'pointCost': point_cost,
+        'redeemedAt': now
+    })
+    _entry(transaction, uid, -point_cost, 'redeem', balance - point_cost,
+           user_data.get('totalPoints', 0),
+           {'prizeId': prize_id, 'redemptionId': redemption_ref.id})
+    return {'redeemed': True, 'balance': balance - point_cost, 'redemptionId': redemption_ref.id}
+
+
+def redeem(uid, prize_id, point_cost):
+    """
+    Spend points on a prize if the balance covers it. The balance check,
+    the decrement, the redemption record and the ledger entry commit in one
+    transaction, so overlapping redemptions can't overdraw. Returns
+    {'redeemed', 'balance', 'redemptionId'}, or None if the user doesn't exist.
+    """
+    return run_in_transaction(_redeem, uid, prize_id, point_cost)
@@ -0,0 +1,141 @@
+"""
+Rank Service
+A user's position by totalPoints from the rank histogram, without ordering
+the users collection. Build the histogram for existing users with
+`python -m services.rank`.
+"""
+
+import os
+import threading
+import time
+from repositories.rank_histogram import rank_histogram_repo, bucket_of, BUCKET_POINTS
+from repositories.users import users_repo
+
+
+class _Fenwick:
+    """Prefix sums over bucket counts with O(log n) update and query"""
+
+    def __init__(self, counts):
+        self.size = len(counts)
+        self._tree = [0] + list(counts)
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self._tree[parent] += self._tree[i]
+
+    def add(self, index, delta):
+        i = index + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix(self, index):
+        """Sum of counts[0..index]"""
+        total = 0
+        i = min(index + 1, self.size)
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+
+class RankIndex:
+    """
+    The summed histogram held as a Fenwick tree over buckets of
+    BUCKET_POINTS points. Moves committed by this worker are applied
+    immediately; the histogram is re-read every `refresh_interval` seconds
+    to pick up everyone else's.
+
+    A user's rank is 1 + the number of users in higher buckets, so it is
+    exact when nobody else shares their bucket and otherwise the best rank
+    within it (`approximate` in the result).
+    """
+
+    def __init__(self, refresh_interval=30):
+        self.refresh_interval = refresh_interval
+        self._counts = None
+        self._tree = None
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        totals = rank_histogram_repo.totals()
+        size = max(totals, default=0) + 1
+        # A histogram that was never backfilled can go negative; count it as empty
+        counts = [max(0, totals.get(b, 0)) for b in range(size)]
+        self._counts = counts
+        self._tree = _Fenwick(counts)
+        self._loaded_at = time.time()
+
+    def _ensure_fresh(self):
+        if self._counts is None or time.time() - self._loaded_at >= self.refresh_interval:
+            self._load()
+
+    def _grow(self, bucket):
+        if bucket >= len(self._counts):
+            self._counts.extend([0] * (bucket + 1 - len(self._counts)))
+            self._tree = _Fenwick(self._counts)
+
+    def moved(self, old_points, new_points):
+        """Apply a committed move (see RankHistogramRepository.move_write)"""
+        with self._lock:
+            if self._counts is None:
+                return
+            if old_points is not None:
+                old_bucket = bucket_of(old_points)
+                if old_bucket < len(self._counts) and self._counts[old_bucket] > 0:
+                    self._counts[old_bucket] -= 1
+                    self._tree.add(old_bucket, -1)
+            new_bucket = bucket_of(new_points)
+            self._grow(new_bucket)
+            self._counts[new_bucket] += 1
+            self._tree.add(new_bucket, 1)
+
+    def record(self, old_points, new_points):
+        """Write and apply a move outside a transaction (profile creation)"""
+        write = rank_histogram_repo.move_write(old_points, new_points)
+        if write:
+            ref, data = write
+            ref.set(data, merge=True)
+        self.moved(old_points, new_points)
+
+    def rank(self, total_points):
+        """{'rank', 'users', 'approximate'} for a user with total_points"""
+        with self._lock:
+            self._ensure_fresh()
+            bucket = bucket_of(total_points)
+            users = self._tree.prefix(len(self._counts) - 1)
+            at_or_below = self._tree.prefix(bucket)
+            in_bucket = self._counts[bucket] if bucket < len(self._counts) else 0
+        return {
+            'rank': users - at_or_below + 1,
+            'users': users,
+            'approximate': BUCKET_POINTS > 1 and in_bucket > 1
+        }
+
+    def backfill(self):
+        """Rebuild the histogram from every user's totalPoints (one full scan)"""
+        counts = {}
+        users = 0
+        for snapshot in users_repo.collection().select(['totalPoints']).stream():
+            bucket = bucket_of((snapshot.to_dict() or {}).get('totalPoints', 0))
+            counts[bucket] = counts.get(bucket, 0) + 1
+            users += 1
+        rank_histogram_repo.replace(counts)
+        with self._lock:
+            self._counts = None
+        print(f"🏅 Rank histogram rebuilt from {users} users")
+        return users
+
+
+# Global instance
+rank_index = RankIndex(
+    refresh_interval=int(os.getenv('RANK_REFRESH', 30))
+)
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    rank_index.backfill()
@@ -0,0 +1,67 @@
+"""
+Rewards
+The sticker table and every rule about unlocking stickers, shared by all
+point-awarding routes and the prizes endpoints
+"""
+
+import bisect
+from types import MappingProxyType
+
+# Stickers unlock once a user's totalPoints reaches their pointCost
+STICKERS = tuple(MappingProxyType(sticker) for sticker in sorted([
+    {'stickerId': 1, 'name': 'Bronze Star', 'pointCost': 0, 'description': 'Welcome sticker!'},
+    {'stickerId': 2, 'name': 'Silver Star', 'pointCost': 100, 'description': 'Read your first book!'},
+    {'stickerId': 3, 'name': 'Gold Star', 'pointCost': 200, 'description': 'Keep reading!'},
+    {'stickerId': 4, 'name': 'Reading Master', 'pointCost': 300, 'description': 'You\'re doing great!'},
+    {'stickerId': 5, 'name': 'Word Wizard', 'pointCost': 400, 'description': 'Amazing progress!'},
+    {'stickerId': 6, 'name': 'Book Champion', 'pointCost': 500, 'description': 'Outstanding reader!'},
+    {'stickerId': 7, 'name': 'Super Reader', 'pointCost': 600, 'description': 'Incredible dedication!'},
+    {'stickerId': 8, 'name': 'Ultimate Scholar', 'pointCost': 700, 'description': 'You\'re a legend!'},
+], key=lambda s: (s['pointCost'], s['stickerId'])))
+
+_THRESHOLDS = tuple(s['pointCost'] for s in STICKERS)
+
+# Response fragments built once. Plain dicts so they can be serialized;
+# they are shared between requests and must not be modified.
+_CARDS = MappingProxyType({s['stickerId']: dict(s) for s in STICKERS})
+_STATUS_CARDS = MappingProxyType({
+    (s['stickerId'], unlocked, can_unlock): {**s, 'unlocked': unlocked, 'canUnlock': can_unlock}
+    for s in STICKERS for unlocked in (False, True) for can_unlock in (False, True)
+})
+
+
+def sticker(sticker_id):
+    """Response fragment for one sticker, or None if there's no such sticker"""
+    return _CARDS.get(sticker_id)
+
+
+def earned_count(total_points):
+    """How many stickers (cheapest first) total_points has reached"""
+    return bisect.bisect_right(_THRESHOLDS, total_points)
+
+
+def unlock(unlocked_stickers, total_points):
+    """
+    unlocked_stickers plus every sticker total_points has earned, in the
+    order stickers unlock, as a new list
+    """
+    result = list(unlocked_stickers)
+    have = set(result)
+    for s in STICKERS[:earned_count(total_points)]:
+        if s['stickerId'] not in have:
+            result.append(s['stickerId'])
+    return result
+
+
+def catalog(unlocked_stickers, total_points):
+    """Every sticker with its unlocked/canUnlock status for one user"""
+    have = set(unlocked_stickers)
+    earned = earned_count(total_points)
+    return [_STATUS_CARDS[(s['stickerId'], s['stickerId'] in have, i < earned)]
+            for i, s in enumerate(STICKERS)]
+
+
+def unlocked(unlocked_stickers):
+    """The user's unlocked stickers, in table order"""
+    have = set(unlocked_stickers)
+    return [_CARDS[s['stickerId']] for s in STICKERS if s['stickerId'] in have]
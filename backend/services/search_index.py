@@ -0,0 +1,173 @@
+"""
+Book Search Index
+In-memory n-gram index over book titles and writers for /api/books/search
+"""
+
+import os
+import threading
+import time
+from collections import defaultdict
+from repositories.books import books_repo
+from services.catalog_version import catalog_version
+
+NGRAM = 3
+
+
+def _grams(text):
+    """All 1..NGRAM-grams of a string"""
+    grams = set()
+    for n in range(1, NGRAM + 1):
+        for i in range(len(text) - n + 1):
+            grams.add(text[i:i + n])
+    return grams
+
+
+def _query_grams(query):
+    if len(query) <= NGRAM:
+        return {query}
+    return {query[i:i + NGRAM] for i in range(len(query) - NGRAM + 1)}
+
+
+def _rank(query, title, writer):
+    """Lower is better; None means no match (same substring rule as before)"""
+    if title == query:
+        return 0
+    if title.startswith(query):
+        return 1
+    if any(word.startswith(query) for word in title.split()):
+        return 2
+    if query in title:
+        return 3
+    if writer.startswith(query) or any(word.startswith(query) for word in writer.split()):
+        return 4
+    if query in writer:
+        return 5
+    return None
+
+
+class BookSearchIndex:
+    """
+    Posting lists from n-grams of the lowercased title and writer to book
+    ids. Candidates are the intersection of the query's n-gram postings and
+    are then checked with the original substring test, so results match the
+    old full scan, just ranked. Sentence `contents` are not kept in memory.
+
+    The index is tied to the catalog version: uploads in this worker are
+    added incrementally, and a version change made by another worker
+    triggers a rebuild on the next query. The mobile app writes and deletes
+    books in Firestore directly without bumping the version, so the index is
+    also rebuilt once it is `max_age` seconds old.
+    """
+
+    def __init__(self, max_age=600):
+        self.max_age = max_age
+        self._books = {}  # bookId -> (book data without contents, title, writer)
+        self._postings = defaultdict(set)
+        self._version = None
+        self._built_at = 0
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+
+    def _add(self, book):
+        book_id = book['bookId']
+        if book_id in self._books:
+            self._remove(book_id)
+
+        data = {k: v for k, v in book.items() if k != 'contents'}
+        title = str(book.get('title', '')).lower()
+        writer = str(book.get('writer', '')).lower()
+        self._books[book_id] = (data, title, writer)
+        for gram in _grams(title) | _grams(writer):
+            self._postings[gram].add(book_id)
+
+    def _remove(self, book_id):
+        _, title, writer = self._books.pop(book_id)
+        for gram in _grams(title) | _grams(writer):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(book_id)
+                if not postings:
+                    del self._postings[gram]
+
+    def rebuild(self):
+        """Re-read the catalog (everything but contents) and rebuild the index"""
+        version = catalog_version.current()
+        books = books_repo.list(fields=['title', 'writer', 'publisher', 'difficulty', 'source',
+                                        'sentenceCount', 'cover', 'uploadedBy', 'uploadedAt'])
+        with self._lock:
+            self._books = {}
+            self._postings = defaultdict(set)
+            for book in books:
+                self._add(book)
+            self._version = version
+            self._built_at = time.time()
+        print(f"🔎 Search index built: {len(books)} books (catalog v{version})")
+
+    def _stale(self):
+        return (self._version != catalog_version.current()
+                or time.time() - self._built_at >= self.max_age)
+
+    def ensure_fresh(self):
+        if not self._stale():
+            return
+        if self._version is None:
+            # Nothing to serve yet: wait for whoever is building it
+            with self._rebuild_lock:
+                if self._stale():
+                    self.rebuild()
+        elif self._rebuild_lock.acquire(blocking=False):
+            # One request rebuilds; the others keep searching the current index
+            try:
+                if self._stale():
+                    self.rebuild()
+            except Exception as e:
+                # Keep the old index and retry on the next query
+                print(f"Search index rebuild error: {str(e)}")
+            finally:
+                self._rebuild_lock.release()
+
+    def add(self, book, previous_version, new_version):
+        """
+        Index a freshly uploaded book. If the catalog moved by more than this
+        upload, another worker changed it too and the next query rebuilds.
+        """
+        with self._lock:
+            if self._version is None:
+                return
+            self._add(book)
+            if self._version == previous_version and new_version == previous_version + 1:
+                self._version = new_version
+
+    def search(self, query, limit=None):
+        """Books whose title or writer contains `query`, best matches first"""
+        self.ensure_fresh()
+        query = query.lower()
+
+        with self._lock:
+            candidates = None
+            for gram in _query_grams(query):
+                postings = self._postings.get(gram, set())
+                candidates = postings.copy() if candidates is None else candidates & postings
+                if not candidates:
+                    return []
+
+            ranked = []
+            for book_id in candidates:
+                data, title, writer = self._books[book_id]
+                rank = _rank(query, title, writer)
+                if rank is not None:
+                    ranked.append((rank, title, book_id, data))
+
+        ranked.sort(key=lambda r: (r[0], r[1], r[2]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [dict(data) for _, _, _, data in ranked]
+
+    def __len__(self):
+        return len(self._books)
+
+
+# Global instance
+book_search_index = BookSearchIndex(
+    max_age=int(os.getenv('CATALOG_INDEX_MAX_AGE', 600))
+)
@@ -0,0 +1,120 @@
+"""
+Session Reaper
+Closes reading sessions abandoned mid-book and compacts their word logs.
+Run it from cron with `python -m services.session_reaper`, or in-process by
+setting SESSION_REAPER_INTERVAL.
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta
+from repositories.reading_sessions import reading_sessions_repo
+
+
+class SessionReaper:
+    """
+    A session is abandoned once it has been active with no activity for
+    `idle_hours`. Abandoned sessions that never got past the first sentence
+    and recorded no words are deleted; the rest are closed (active: False,
+    abandoned: True) with their word log folded into summary counters.
+    Each session is re-checked in a transaction and skipped if it saw
+    activity or was completed since it was listed. Sessions are processed a
+    page at a time.
+    """
+
+    def __init__(self, idle_hours=24, page_size=200):
+        self.idle_hours = idle_hours
+        self.page_size = page_size
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def _reap(self, session_data, now, stats):
+        outcome, words = reading_sessions_repo.close_abandoned(
+            session_data['sessionId'], session_data.get('lastActivity'), now
+        )
+        if outcome == 'deleted':
+            stats['deleted'] += 1
+        elif outcome == 'closed':
+            stats['closed'] += 1
+            stats['wordsCompacted'] += words
+        else:
+            stats['skipped'] += 1
+
+    def run(self, now=None):
+        """Reap every abandoned session; returns counts of what was done"""
+        now = now or datetime.now()
+        cutoff = now - timedelta(hours=self.idle_hours)
+        stats = {'closed': 0, 'deleted': 0, 'skipped': 0, 'wordsCompacted': 0}
+
+        # Sessions with lastActivity: each page drops out of the query once reaped
+        while True:
+            page = reading_sessions_repo.idle(cutoff, self.page_size)
+            for session_data in page:
+                self._reap(session_data, now, stats)
+            if len(page) < self.page_size:
+                break
+
+        # Old sessions that never recorded lastActivity
+        after = None
+        while True:
+            page = reading_sessions_repo.started_before(cutoff, self.page_size, after=after)
+            for session_data in page:
+                if 'lastActivity' not in session_data:
+                    self._reap(session_data, now, stats)
+            if len(page) < self.page_size:
+                break
+            after = page[-1]['startTime']
+
+        # Closed sessions whose word log deletion was interrupted
+        while True:
+            page = reading_sessions_repo.uncompacted(self.page_size)
+            for session_data in page:
+                reading_sessions_repo.compact_words(session_data['sessionId'])
+            if len(page) < self.page_size:
+                break
+
+        print(f"🧹 Session reaper: closed {stats['closed']}, deleted {stats['deleted']}, "
+              f"skipped {stats['skipped']}, compacted {stats['wordsCompacted']} words")
+        return stats
+
+    def start(self, interval):
+        """Run every `interval` seconds on a daemon timer (once per process)"""
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._schedule(interval)
+
+    def _schedule(self, interval):
+        self._timer = threading.Timer(interval, self._tick, args=(interval,))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _tick(self, interval):
+        try:
+            self.run()
+        except Exception as e:
+            print(f"⚠️  Session reaper failed: {str(e)}")
+        with self._lock:
+            self._schedule(interval)
+
+
+# Global instance
+session_reaper = SessionReaper(
+    idle_hours=float(os.getenv('SESSION_IDLE_HOURS', 24)),
+    page_size=int(os.getenv('SESSION_REAPER_PAGE_SIZE', 200))
+)
+
+
+if __name__ == '__main__':
+    import argparse
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='Close and compact abandoned reading sessions')
+    parser.add_argument('--idle-hours', type=float, default=session_reaper.idle_hours,
+                        help='hours without activity before a session counts as abandoned')
+    args = parser.parse_args()
+
+    session_reaper.idle_hours = args.idle_hours
+    session_reaper.run()
@@ -0,0 +1,113 @@
+"""
+Speech Hints
+Per-sentence expected tokens and STT phrase hints, computed once at upload
+"""
+
+import os
+import re
+from num2words import num2words
+from repositories.books import books_repo
+from utils.cache import LRUCache
+
+
+def clean_word(word):
+    """Lowercase a word and drop everything but letters and digits"""
+    return re.sub(r'[^a-z0-9]', '', word.lower())
+
+
+def normalize_text(text):
+    """Digits to words, hyphens to spaces, lowercase (same as transcripts)"""
+    if not text:
+        return ""
+    text = re.sub(r'\d+', lambda m: num2words(int(m.group(0))), text)
+    return text.replace("-", " ").lower().strip()
+
+
+def sentence_hints(sentence):
+    """
+    Everything the speech path needs for one sentence:
+        - tokens: normalized expected words, numbers spelled out
+        - numbers: digit -> word expansions found in the sentence
+        - hints: STT phrases (the words, number expansions and a $-prefixed
+          full-sentence phrase)
+    `text` is kept so stale hints can be detected if the sentence is edited.
+    """
+    words = sentence.split()
+    numbers = {}
+    for digits in re.findall(r'\d+', sentence):
+        numbers[digits] = num2words(int(digits)).replace("-", " ")
+
+    tokens = [clean_word(w) for w in normalize_text(sentence).split()]
+
+    # dict keeps first-seen order while dropping duplicates
+    phrases = dict.fromkeys(words + list(numbers.values()))
+    if words:
+        phrases[f"${' '.join(words)}"] = None
+
+    return {
+        'text': sentence,
+        'tokens': [t for t in tokens if t],
+        'numbers': numbers,
+        'hints': list(phrases)
+    }
+
+
+class SpeechHintStore:
+    """
+    Looks up a sentence's hints by bookId + sentenceIndex. Stored hints are
+    read a page at a time and cached. Paged books trust hints stamped with
+    the book's speechVersion; other stored hints are checked against the
+    sentence text, and books uploaded before hints existed, or edited in the
+    app since, get hints computed from the current text.
+    """
+
+    def __init__(self, cache_size=200, cache_ttl=600):
+        self.cache = LRUCache(cache_size, ttl=cache_ttl)
+
+    def _stored_page(self, book_id, page_index):
+        key = (book_id, page_index)
+        page = self.cache.get(key)
+        if page is None:
+            page = books_repo.speech_page(book_id, page_index) or {}
+            self.cache.set(key, page)
+        return page
+
+    def get(self, book_id, sentence_index):
+        """Hints for one sentence, or None if the book or sentence doesn't exist"""
+        book = books_repo.get(book_id)
+        if book is None or sentence_index < 0:
+            return None
+
+        stored = None
+        page_size = book.get('pageSize')
+        if page_size:
+            page = self._stored_page(book_id, sentence_index // page_size)
+            hints = page.get('hints', [])
+            offset = sentence_index - page.get('start', 0)
+            if 0 <= offset < len(hints):
+                stored = hints[offset]
+                # Paged books are only written through the API: hints of the
+                # same version as the book are current without reading the
+                # sentence page
+                if ('pageCount' in book and book.get('speechVersion')
+                        and page.get('version') == book['speechVersion']):
+                    return stored
+
+        if 'pageCount' in book:
+            window = books_repo.sentences(book_id, sentence_index, sentence_index + 1)
+            sentence = window[0][0] if window and window[0] else None
+        else:
+            contents = book.get('contents', [])
+            sentence = contents[sentence_index] if sentence_index < len(contents) else None
+        if sentence is None:
+            return None
+
+        if stored is not None and stored.get('text') == sentence:
+            return stored
+        return sentence_hints(sentence)
+
+# Global instance
+speech_hint_store = SpeechHintStore(
+    cache_size=int(os.getenv('SPEECH_HINT_CACHE_SIZE', 200)),
+    cache_ttl=int(os.getenv('BOOK_CACHE_TTL', 600))
+)
@@ -3,42 +3,74 @@ Speech Recognition and Pronunciation Evaluation Service
 Uses Google Speech-to-Text API for voice recognition.
 """
 
-from google.cloud import speech
 import os
 import json
 import struct
+import threading
 import traceback
-import re
-from num2words import num2words
+from services.speech_hints import clean_word, normalize_text
 
 
 class SpeechService:
-    def __init__(self):
-        try:
-            google_creds_json = os.getenv('GOOGLE_APPLICATION_CREDENTIALS_JSON')
-            if google_creds_json:
-                import tempfile
-                cred_dict = json.loads(google_creds_json)
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-                    json.dump(cred_dict, f)
-                    os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = f.name
-            else:
-                creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
-                if creds_path:
-                    os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = creds_path
+    """
+    Google STT/TTS wrapper. The google.cloud client libraries are imported
+    and the clients built on first use (or by warm_up()), not at import
+    time, so workers boot without paying for gRPC channel setup.
+    """
 
-            self.client = speech.SpeechClient()
-            print("✅ Google Speech-to-Text initialized successfully")
-
-            from google.cloud import texttospeech
-            self.tts_client = texttospeech.TextToSpeechClient()
-            print("✅ Google Text-to-Speech initialized successfully")
+    def __init__(self):
+        self._client = None
+        self._tts_client = None
+        self._initialized = False
+        self._init_lock = threading.Lock()
 
-        except Exception as e:
-            print(f"⚠️  Google Speech/TTS not configured: {e}")
-            print(traceback.format_exc())
-            self.client = None
-            self.tts_client = None
+    @staticmethod
+    def _load_credentials():
+        """Service-account credentials from the env JSON, or None for ADC"""
+        google_creds_json = os.getenv('GOOGLE_APPLICATION_CREDENTIALS_JSON')
+        if not google_creds_json:
+            return None
+        from google.oauth2 import service_account
+        return service_account.Credentials.from_service_account_info(
+            json.loads(google_creds_json)
+        )
+
+    def _ensure_clients(self):
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            try:
+                from google.cloud import speech, texttospeech
+                credentials = self._load_credentials()
+
+                self._client = speech.SpeechClient(credentials=credentials)
+                print("✅ Google Speech-to-Text initialized successfully")
+
+                self._tts_client = texttospeech.TextToSpeechClient(credentials=credentials)
+                print("✅ Google Text-to-Speech initialized successfully")
+
+            except Exception as e:
+                print(f"⚠️  Google Speech/TTS not configured: {e}")
+                print(traceback.format_exc())
+                self._client = None
+                self._tts_client = None
+            self._initialized = True
+
+    @property
+    def client(self):
+        self._ensure_clients()
+        return self._client
+
+    @property
+    def tts_client(self):
+        self._ensure_clients()
+        return self._tts_client
+
+    def warm_up(self):
+        """Build the STT/TTS clients ahead of the first request"""
+        self._ensure_clients()
 
     # ── Dynamic edit-distance resolver ────────────────────────────────────────
     # Replaces both hardcoded homophone maps. For each spoken word, if it's
@@ -66,13 +98,18 @@ class SpeechService:
         distance. No hardcoded maps — if a spoken word is close enough to an
         expected word, it gets normalized to that word.
         """
-        expected_clean = [
-            re.sub(r'[^a-z0-9]', '', w.lower()) for w in expected_words
-        ]
+        expected_clean = [clean_word(w) for w in expected_words]
+        return SpeechService._resolve_against_tokens(transcript_words, expected_clean)
+
+    @staticmethod
+    def _resolve_against_tokens(transcript_words, expected_clean):
+        """Same as above for expected words that are already normalized"""
+        # Unique tokens, first-seen order (ties keep the earliest match)
+        expected_clean = list(dict.fromkeys(expected_clean))
 
         resolved = []
         for word in transcript_words:
-            clean = re.sub(r'[^a-z0-9]', '', word.lower())
+            clean = clean_word(word)
             best_match = None
             best_dist = float('inf')
 
@@ -105,19 +142,26 @@ class SpeechService:
         full_sentence = " ".join(expected_words)
         phrases.append(f"${full_sentence}")
 
+        return SpeechService._phrase_contexts(list(set(phrases)))
+
+    @staticmethod
+    def _phrase_contexts(phrases):
+        """SpeechContext for a ready-made phrase list (see speech_hints)"""
+        if not phrases:
+            return []
+
+        from google.cloud import speech
+
         return [
             speech.SpeechContext(
-                phrases=list(set(phrases)),
+                phrases=phrases,
                 boost=20.0,
             )
         ]
 
     def _normalize_transcript(self, text):
         """Converts digits to words and removes hyphens. No homophone map."""
-        if not text:
-            return ""
-        text = re.sub(r'\d+', lambda m: num2words(int(m.group(0))), text)
-        return text.replace("-", " ").lower().strip()
+        return normalize_text(text)
 
     def _read_wav_sample_rate(self, audio_content):
         try:
@@ -139,17 +183,29 @@ class SpeechService:
             print("❌ Speech client not initialized")
             return None
 
+        from google.cloud import speech
+
         try:
             encoding = kwargs.get('encoding', 'WAV')
-            expected_words = kwargs.get('hints', [])
+            # Precomputed hints for a stored sentence (see speech_hints),
+            # otherwise the raw word list sent by the client
+            precomputed = kwargs.get('sentence_hints')
+            if precomputed:
+                expected_tokens = precomputed['tokens']
+            else:
+                expected_words = kwargs.get('hints', [])
+                expected_tokens = [clean_word(w) for w in expected_words]
 
             print(f"📤 Sending {len(audio_content)} bytes to Google STT (encoding={encoding})")
             print(f"   first 8 bytes : {audio_content[:8].hex()}")
-            if expected_words:
-                print(f"   expected words: {expected_words}")
+            if expected_tokens:
+                print(f"   expected words: {expected_tokens}")
 
             audio = speech.RecognitionAudio(content=audio_content)
-            speech_contexts = self._build_speech_contexts(expected_words)
+            if precomputed:
+                speech_contexts = self._phrase_contexts(precomputed['hints'])
+            else:
+                speech_contexts = self._build_speech_contexts(expected_words)
 
             shared_params = dict(
                 language_code=language_code,
@@ -193,9 +249,9 @@ class SpeechService:
 
             # Step 2: dynamically resolve spoken words against expected words
             # using edit distance — no hardcoded homophone map
-            if expected_words:
+            if expected_tokens:
                 spoken_words = normalized.split()
-                resolved = self._resolve_against_expected(spoken_words, expected_words)
+                resolved = self._resolve_against_tokens(spoken_words, expected_tokens)
                 clean_transcript = " ".join(resolved)
             else:
                 clean_transcript = normalized
@@ -0,0 +1,64 @@
+"""
+User Progress
+Everything that follows a user reading further or earning points, shared by
+/api/user/progress, /api/reading/complete and /api/reading/sync: the user's
+progress, stickers and balance (with its ledger entry), the rank histogram
+and the stats totals are queued in the caller's transaction, and the
+leaderboard and rank index are told once it has committed
+"""
+
+from datetime import datetime
+from repositories.rank_histogram import rank_histogram_repo
+from repositories.user_stats import user_stats_repo
+from repositories.users import users_repo
+from services import points_ledger, rewards
+from services.leaderboard import leaderboard
+from services.rank import rank_index
+from services.user_stats import apply_progress, apply_session
+from utils.progress import progress_update, find_progress
+
+
+def record(transaction, uid, user_data, stats, book_id, sentences_read, total_sentences,
+           points_earned, reason, session_accuracy=None, **details):
+    """
+    Queue the writes for a user reaching `sentences_read` of `book_id` and
+    earning `points_earned`. `user_data` and `stats` are as read in the
+    transaction; stats that don't exist yet are left to be built on first
+    read. `session_accuracy` is given when a reading session completes.
+    Ledger `details` are stored with the entry. Returns the user field
+    updates, with balances as committed, for the request's user snapshot
+    and for committed().
+    """
+    now = datetime.now()
+    new_points = user_data.get('points', 0) + points_earned
+    new_total_points = user_data.get('totalPoints', 0) + points_earned
+
+    user_updates = {
+        **progress_update(book_id, sentences_read, total_sentences),
+        'unlockedStickers': rewards.unlock(user_data.get('unlockedStickers', [1]), new_total_points),
+        'lastActivity': now
+    }
+    points = points_ledger.credit(transaction, uid, user_data, points_earned, reason,
+                                  bookId=book_id, **details)
+    transaction.update(users_repo.ref(uid), {**user_updates, **points})
+    user_updates.update({'points': new_points, 'totalPoints': new_total_points})
+
+    histogram_move = rank_histogram_repo.move_write(user_data.get('totalPoints', 0), new_total_points)
+    if histogram_move:
+        transaction.set(*histogram_move, merge=True)
+
+    if stats is not None:
+        if session_accuracy is not None:
+            stats = apply_session(stats, session_accuracy)
+        stats = apply_progress(stats, find_progress(user_data, book_id),
+                               sentences_read, total_sentences)
+        transaction.set(user_stats_repo.ref(uid), {**stats, 'updatedAt': now})
+
+    return user_updates
+
+
+def committed(user_updates, points_earned):
+    """Apply a committed record() to this worker's leaderboard and rank index"""
+    total_points = user_updates['totalPoints']
+    leaderboard.points_changed(total_points)
+    rank_index.moved(total_points - points_earned, total_points)
@@ -0,0 +1,130 @@
+"""
+User Stats
+Per-user reading totals for /api/prizes/stats, achievements and the
+leaderboard, kept in user_stats/<uid> instead of recomputed per request.
+Backfill existing users with `python -m services.user_stats`.
+"""
+
+from datetime import datetime
+from repositories.base import run_in_transaction
+from repositories.reading_sessions import reading_sessions_repo
+from repositories.user_stats import user_stats_repo, STATS_FIELDS
+from repositories.users import users_repo
+from utils.progress import read_progress, is_completed
+
+
+def progress_totals(user_data):
+    """booksStarted/booksCompleted/sentencesRead from a user's progress"""
+    progress = read_progress(user_data)
+    return {
+        'booksStarted': len(progress),
+        'booksCompleted': len([p for p in progress if is_completed(p)]),
+        'sentencesRead': sum(p.get('sentencesRead', 0) for p in progress)
+    }
+
+
+def apply_progress(stats, old_entry, sentences_read, total_sentences):
+    """
+    Stats after one book's progress entry goes from `old_entry` (None if
+    the book wasn't started) to the given counts
+    """
+    stats = {field: stats.get(field, 0) for field in STATS_FIELDS}
+    new_entry = {'sentencesRead': sentences_read, 'totalSentences': total_sentences}
+    if old_entry is None:
+        stats['booksStarted'] += 1
+        old_entry = {}
+    stats['sentencesRead'] += sentences_read - old_entry.get('sentencesRead', 0)
+    stats['booksCompleted'] += int(is_completed(new_entry)) - int(bool(old_entry) and is_completed(old_entry))
+    return stats
+
+
+def apply_session(stats, accuracy):
+    """Stats after one more completed session"""
+    stats = {field: stats.get(field, 0) for field in STATS_FIELDS}
+    stats['sessionCount'] += 1
+    stats['accuracySum'] += accuracy
+    return stats
+
+
+def _rebuild(transaction, uid, force):
+    """
+    Transaction body for UserStats.rebuild: the user, their stats document
+    and their completed sessions are read in the transaction, so an update
+    that lands meanwhile makes Firestore retry instead of being lost
+    """
+    user_ref = users_repo.ref(uid)
+    stats_ref = user_stats_repo.ref(uid)
+    snapshots = {snap.reference.path: snap for snap in transaction.get_all([user_ref, stats_ref])}
+    if snapshots[stats_ref.path].exists and not force:
+        return snapshots[stats_ref.path].to_dict()
+
+    user_data = users_repo._to_dict(snapshots[user_ref.path])
+    if user_data is None:
+        return None
+
+    query = reading_sessions_repo.completed_query(uid).select(['accuracy', 'abandoned'])
+    sessions = [snap.to_dict() or {} for snap in transaction.get(query)]
+    sessions = [s for s in sessions if not s.get('abandoned')]
+
+    stats = {
+        **progress_totals(user_data),
+        'sessionCount': len(sessions),
+        'accuracySum': sum(s.get('accuracy', 0) for s in sessions),
+        'updatedAt': datetime.now()
+    }
+    transaction.set(stats_ref, stats)
+    return stats
+
+
+class UserStats:
+    """
+    Reads of user_stats documents. Users with no document yet (created
+    before it existed, or whose profile was just re-created) get one built
+    from their progress and completed sessions on first read; after that
+    the transactions in reading_routes/user_routes keep it current.
+    """
+
+    def get(self, uid):
+        """A user's stats document, or None if the user doesn't exist"""
+        return user_stats_repo.get(uid) or self.rebuild(uid)
+
+    def get_many(self, uids):
+        """Stats for several users as {uid: stats}"""
+        stats = user_stats_repo.get_many(uids)
+        for uid in uids:
+            if uid not in stats:
+                built = self.rebuild(uid)
+                if built is not None:
+                    stats[uid] = built
+        return stats
+
+    def rebuild(self, uid, force=False):
+        """Build a user's stats document (unless one exists and not `force`)"""
+        return run_in_transaction(_rebuild, uid, force)
+
+    def backfill(self, force=False):
+        """Build stats for every user without them (all users with `force`)"""
+        count = 0
+        for user_ref in users_repo.collection().list_documents():
+            self.rebuild(user_ref.id, force=force)
+            count += 1
+        print(f"📊 User stats backfilled for {count} users")
+        return count
+
+
+# Global instance
+user_stats = UserStats()
+
+
+if __name__ == '__main__':
+    import argparse
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='Build user_stats documents for existing users')
+    parser.add_argument('--force', action='store_true',
+                        help='rebuild stats that already exist instead of skipping them')
+    args = parser.parse_args()
+
+    user_stats.backfill(force=args.force)
@@ -0,0 +1,112 @@
+"""
+Test fixtures
+The app runs on the in-memory backend (DATA_BACKEND=memory). With
+FIREBASE_AUTH_EMULATOR_HOST set, firebase_admin accepts unsigned ID tokens,
+so requests authenticate without network access.
+"""
+
+import os
+import sys
+import time
+
+os.environ['DATA_BACKEND'] = 'memory'
+os.environ['FIREBASE_AUTH_EMULATOR_HOST'] = 'localhost:9099'
+os.environ['WARM_UP_ON_BOOT'] = 'false'
+os.environ['SESSION_REAPER_INTERVAL'] = '0'
+os.environ.pop('MEMORY_SEED_FILE', None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt
+import pytest
+from app import create_app
+from config import firebase_config
+from repositories.books import books_repo
+from repositories.memory import MemoryClient
+from repositories.reading_sessions import reading_sessions_repo
+from services.book_buckets import book_buckets
+from services.catalog_version import catalog_version
+from services.leaderboard import leaderboard
+from services.rank import rank_index
+from services.search_index import book_search_index
+from services.speech_hints import speech_hint_store
+from utils.token_cache import token_cache
+
+
+def id_token(uid, issued_at=None):
+    """Unsigned ID token, accepted while the Auth emulator host is set"""
+    issued_at = int(time.time()) if issued_at is None else issued_at
+    return jwt.encode({
+        'aud': 'ella-local',
+        'iss': 'https://securetoken.google.com/ella-local',
+        'sub': uid,
+        'uid': uid,
+        'iat': issued_at,
+        'auth_time': issued_at,
+        'exp': issued_at + 3600
+    }, key='', algorithm='none')
+
+
+class Api:
+    """Test client calls as a signed-in user; returns (status, json)"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def call(self, method, url, uid='u1', token=None, **kwargs):
+        headers = {'Authorization': f'Bearer {token or id_token(uid)}'}
+        response = getattr(self.client, method)(url, headers=headers, **kwargs)
+        return response.status_code, response.get_json(silent=True)
+
+    def signup(self, uid, name='Kid', role='Student'):
+        response = self.client.post('/api/auth/signup', json={
+            'idToken': id_token(uid), 'name': name, 'role': role
+        })
+        assert response.status_code in (200, 201), response.get_json()
+        return response.get_json()
+
+    def upload(self, contents, uid='t1', **fields):
+        """Upload a book as a teacher and return its id"""
+        book = {'title': 'Book', 'writer': 'Writer', 'difficulty': 'Beginner',
+                'source': 'Teacher', 'contents': contents, **fields}
+        status, body = self.call('post', '/api/books/upload', uid=uid, json=book)
+        assert status == 201, body
+        return body['book']['bookId']
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app(warm_up_clients=False)
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture(autouse=True)
+def db():
+    """A fresh in-memory database, with every per-process cache dropped"""
+    firebase_config.initialize_firebase()
+    firebase_config.db = MemoryClient()
+
+    books_repo.cache.clear()
+    reading_sessions_repo.meta_cache.clear()
+    speech_hint_store.cache.clear()
+    token_cache._tokens.clear()
+    token_cache._invalidated.clear()
+    leaderboard._rows = None
+    rank_index._counts = None
+    catalog_version._version = None
+    book_search_index._version = None
+    book_buckets._version = None
+    yield firebase_config.db
+
+
+@pytest.fixture
+def api(app):
+    return Api(app.test_client())
+
+
+@pytest.fixture
+def book_id(api):
+    """A two-sentence book uploaded by teacher t1, with student u1 signed up"""
+    api.signup('u1')
+    api.signup('t1', name='Teacher', role='Teacher')
+    return api.upload(['The cat sat.', 'A dog ran.'])
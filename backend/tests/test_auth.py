@@ -0,0 +1,25 @@
+"""Auth: token cache invalidation and the per-request user document"""
+
+import time
+from conftest import id_token
+from utils.progress import find_progress, progress_update
+from utils.user_context import UserDocument
+
+
+def test_logout_rejects_earlier_tokens(api):
+    api.signup('u1')
+    old_token = id_token('u1', issued_at=int(time.time()) - 60)
+    assert api.call('get', '/api/user/progress', token=old_token)[0] == 200
+
+    assert api.call('post', '/api/auth/logout', token=old_token)[0] == 200
+
+    assert api.call('get', '/api/user/progress', token=old_token)[0] == 401
+    assert api.call('get', '/api/user/progress', token=id_token('u1', issued_at=int(time.time()) + 1))[0] == 200
+
+
+def test_mirror_unquotes_backticked_book_ids(api):
+    api.signup('u1')
+    user_doc = UserDocument('u1')
+    user_doc.get('bookProgress')
+    user_doc.mirror(progress_update('1abc', 2, 5))
+    assert find_progress(user_doc.get('bookProgress'), '1abc')['sentencesRead'] == 2
@@ -0,0 +1,72 @@
+"""Books: batched uploads and stored speech hints"""
+
+from repositories.books import books_repo
+from repositories.memory import MemoryWriteBatch
+from services.speech_hints import sentence_hints, speech_hint_store
+
+
+def _book(i, sentences=10, sentence_bytes=100):
+    contents = [f'Sentence {j} ' + 'x' * sentence_bytes for j in range(sentences)]
+    data = {'title': f'Book {i}', 'contents': contents, 'sentenceCount': len(contents)}
+    return data, [sentence_hints(s) for s in contents]
+
+
+def test_create_many_caps_batches_by_size(db, monkeypatch):
+    sizes = []
+    commit = MemoryWriteBatch.commit
+
+    def counting_commit(batch):
+        sizes.append(len(batch))
+        return commit(batch)
+
+    monkeypatch.setattr(MemoryWriteBatch, 'commit', counting_commit)
+    # ~2 MiB per book: too many bytes for one commit, far too few writes to split on
+    books = [_book(i, sentences=200, sentence_bytes=5000) for i in range(12)]
+    ids = books_repo.create_many(books)
+
+    assert all(isinstance(book_id, str) for book_id in ids)
+    assert len(sizes) > 1
+    assert all(books_repo.get(book_id) is not None for book_id in ids)
+
+
+def test_failed_batch_only_fails_its_books(db, monkeypatch):
+    commit = MemoryWriteBatch.commit
+    calls = []
+
+    def flaky_commit(batch):
+        calls.append(len(batch))
+        if len(calls) == 2:
+            raise RuntimeError('commit failed')
+        return commit(batch)
+
+    monkeypatch.setattr(MemoryWriteBatch, 'commit', flaky_commit)
+    books = [_book(i, sentences=200, sentence_bytes=5000) for i in range(12)]
+    ids = books_repo.create_many(books)
+
+    failed = [result for result in ids if isinstance(result, Exception)]
+    written = [result for result in ids if isinstance(result, str)]
+    assert failed and written
+    assert all(books_repo.get(book_id) is not None for book_id in written)
+
+
+def test_paged_book_hints_skip_sentence_reads(db, monkeypatch):
+    data, speech = _book(0, sentences=250, sentence_bytes=3000)
+    book_id = books_repo.create(data, speech=speech)
+    assert 'pageCount' in books_repo.get(book_id)
+
+    reads = []
+    sentences = books_repo.sentences
+    monkeypatch.setattr(books_repo, 'sentences', lambda *args: reads.append(args) or sentences(*args))
+
+    assert speech_hint_store.get(book_id, 123) == speech[123]
+    assert reads == []
+    assert speech_hint_store.get(book_id, 250) is None
+
+
+def test_edited_inline_book_gets_fresh_hints(db):
+    data, speech = _book(0, sentences=3)
+    book_id = books_repo.create(data, speech=speech)
+    books_repo.update(book_id, {'contents': ['Edited 2 sentence', *data['contents'][1:]]})
+
+    assert speech_hint_store.get(book_id, 0)['tokens'] == ['edited', 'two', 'sentence']
+    assert speech_hint_store.get(book_id, 1) == speech[1]
@@ -0,0 +1,71 @@
+"""In-memory backend: transactions, batch limits and field paths"""
+
+import threading
+import pytest
+from google.api_core.exceptions import InvalidArgument, NotFound
+from repositories.base import increment, run_in_transaction
+
+
+def test_transactions_are_serializable(db):
+    ref = db.collection('counters').document('c')
+    ref.set({'n': 0})
+
+    def bump(transaction):
+        value = next(iter(transaction.get_all([ref]))).to_dict()['n']
+        transaction.update(ref, {'n': value + 1})
+
+    threads = [threading.Thread(target=run_in_transaction, args=(bump,)) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert ref.get().to_dict()['n'] == 20
+
+
+def test_transaction_rejects_read_after_write(db):
+    ref = db.collection('counters').document('c')
+
+    def body(transaction):
+        transaction.set(ref, {'n': 1})
+        transaction.get_all([ref])
+
+    with pytest.raises(ValueError):
+        run_in_transaction(body)
+    assert not ref.get().exists
+
+
+def test_failed_batch_writes_nothing(db):
+    batch = db.batch()
+    batch.set(db.collection('a').document('1'), {'x': 1})
+    batch.update(db.collection('a').document('missing'), {'x': 2})
+    with pytest.raises(NotFound):
+        batch.commit()
+    assert not db.collection('a').document('1').get().exists
+
+
+def test_batch_limits(db):
+    batch = db.batch()
+    for i in range(501):
+        batch.set(db.collection('a').document(str(i)), {'i': i})
+    with pytest.raises(InvalidArgument):
+        batch.commit()
+
+    batch = db.batch()
+    for i in range(3):
+        batch.set(db.collection('a').document(str(i)), {'blob': 'x' * (4 * 1024 * 1024)})
+    with pytest.raises(InvalidArgument):
+        batch.commit()
+
+
+def test_transforms(db):
+    ref = db.collection('a').document('1')
+    ref.set({'n': 1})
+    ref.update({'n': increment(2), 'm': increment(1)})
+    assert ref.get().to_dict() == {'n': 3, 'm': 1}
+
+
+def test_backticked_field_paths_are_unquoted(db):
+    ref = db.collection('users').document('u1')
+    ref.set({'bookProgress': {}})
+    ref.update({'bookProgress.`1abc`.sentencesRead': 2})
+    assert ref.get().to_dict()['bookProgress'] == {'1abc': {'sentencesRead': 2}}
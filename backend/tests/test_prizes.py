@@ -0,0 +1,44 @@
+"""Prizes: leaderboard limits and redemption validation"""
+
+import pytest
+from repositories.users import users_repo
+from services.leaderboard import MAX_LEADERBOARD
+
+
+@pytest.fixture
+def students(api):
+    for i in range(MAX_LEADERBOARD + 5):
+        api.signup(f's{i}')
+        users_repo.update(f's{i}', {'points': i, 'totalPoints': i})
+
+
+@pytest.mark.parametrize('limit, count', [('3', 3), ('0', 1), ('-5', 1), ('1000', MAX_LEADERBOARD)])
+def test_leaderboard_limit_is_clamped(api, students, limit, count):
+    status, body = api.call('get', f'/api/prizes/leaderboard?limit={limit}', uid='s0')
+    assert status == 200
+    assert body['count'] == count
+    assert body['leaderboard'][0]['totalPoints'] == MAX_LEADERBOARD + 4
+
+
+def test_leaderboard_rejects_non_numeric_limit(api, students):
+    assert api.call('get', '/api/prizes/leaderboard?limit=ten', uid='s0')[0] == 400
+
+
+@pytest.mark.parametrize('point_cost', [True, -1, '10', 1.5])
+def test_redeem_rejects_invalid_point_cost(api, point_cost):
+    api.signup('u1')
+    users_repo.update('u1', {'points': 100})
+    status, _ = api.call('post', '/api/prizes/redeem', json={'prizeId': 'p', 'pointCost': point_cost})
+    assert status == 400
+    assert users_repo.get('u1')['points'] == 100
+
+
+def test_redeem_spends_points_once(api):
+    api.signup('u1')
+    users_repo.update('u1', {'points': 15})
+    status, body = api.call('post', '/api/prizes/redeem', json={'prizeId': 'p', 'pointCost': 10})
+    assert status == 200 and body['newPoints'] == 5
+
+    status, body = api.call('post', '/api/prizes/redeem', json={'prizeId': 'p', 'pointCost': 10})
+    assert status == 400 and body['current'] == 5
+    assert users_repo.get('u1')['points'] == 5
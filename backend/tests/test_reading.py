@@ -0,0 +1,99 @@
+"""Reading sessions: completion, offline sync and its de-duplication"""
+
+import threading
+from repositories.reading_sessions import reading_sessions_repo
+from repositories.users import users_repo
+
+WORDS = [{'word': w, 'sentenceIndex': 0, 'correct': True} for w in ['The', 'cat', 'sat']]
+
+
+def _points(uid='u1'):
+    return users_repo.get(uid)['totalPoints']
+
+
+def _ledger(api):
+    status, body = api.call('get', '/api/prizes/ledger')
+    assert status == 200
+    return body['entries']
+
+
+def test_complete_is_idempotent(api, book_id):
+    status, body = api.call('post', '/api/reading/start', json={'bookId': book_id})
+    session_id = body['session']['sessionId']
+    api.call('post', '/api/reading/record-words', json={'sessionId': session_id, 'words': WORDS})
+    api.call('post', '/api/reading/advance-sentence', json={'sessionId': session_id})
+
+    first = api.call('post', '/api/reading/complete', json={'sessionId': session_id})
+    second = api.call('post', '/api/reading/complete', json={'sessionId': session_id})
+
+    assert first[0] == second[0] == 200
+    assert first[1]['pointsEarned'] > 0
+    assert second[1]['pointsEarned'] == first[1]['pointsEarned']
+    assert _points() == first[1]['pointsEarned']
+    assert len(_ledger(api)) == 1
+
+
+def test_complete_other_users_session(api, book_id):
+    api.signup('u2')
+    session_id = api.call('post', '/api/reading/start', json={'bookId': book_id})[1]['session']['sessionId']
+    status, _ = api.call('post', '/api/reading/complete', uid='u2', json={'sessionId': session_id})
+    assert status == 403
+
+
+def test_sync_resend_is_deduplicated(api, book_id):
+    payload = {'clientSessionId': 'c1', 'bookId': book_id, 'words': WORDS, 'completed': True}
+    status, first = api.call('post', '/api/reading/sync', json=payload)
+    assert status == 200 and not first['duplicate']
+    status, second = api.call('post', '/api/reading/sync', json=payload)
+    assert status == 200 and second['duplicate']
+
+    assert second['sessionId'] == first['sessionId']
+    assert second['pointsEarned'] == first['pointsEarned'] == _points()
+    assert len(reading_sessions_repo.words_read(first['sessionId'], {})) == len(WORDS)
+
+
+def test_concurrent_syncs_pay_once(app, api, book_id):
+    payload = {'clientSessionId': 'c1', 'bookId': book_id, 'words': WORDS, 'completed': True}
+    results = []
+
+    def sync():
+        client = app.test_client()
+        api_for_thread = type(api)(client)
+        results.append(api_for_thread.call('post', '/api/reading/sync', json=payload))
+
+    threads = [threading.Thread(target=sync) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [status for status, _ in results] == [200] * 5
+    assert sum(1 for _, body in results if not body['duplicate']) == 1
+    assert _points() == results[0][1]['pointsEarned']
+    assert len(_ledger(api)) == 1
+
+
+def test_shorter_resync_drops_stale_words_and_keeps_start_time(api, book_id):
+    payload = {'clientSessionId': 'c1', 'bookId': book_id, 'words': WORDS,
+               'startTime': '2026-01-01T10:00:00'}
+    session_id = api.call('post', '/api/reading/sync', json=payload)[1]['sessionId']
+    start_time = reading_sessions_repo.get(session_id)['startTime']
+
+    del payload['startTime']
+    payload['words'] = WORDS[:1]
+    status, _ = api.call('post', '/api/reading/sync', json=payload)
+    assert status == 200
+
+    words = reading_sessions_repo.words_read(session_id, {})
+    assert [w['word'] for w in words] == ['The']
+    session = reading_sessions_repo.get(session_id)
+    assert session['startTime'] == start_time
+    assert session['attemptCount'] == 1
+
+
+def test_sync_validates_words(api, book_id):
+    for words in ([{'word': 'a', 'attempts': True}], [{'word': 'a', 'attempts': -1}],
+                  [{'word': 'a', 'correct': 'yes'}]):
+        status, _ = api.call('post', '/api/reading/sync',
+                             json={'clientSessionId': 'c1', 'bookId': book_id, 'words': words})
+        assert status == 400
@@ -0,0 +1,74 @@
+"""Session reaper: closing, compacting and skipping abandoned sessions"""
+
+from datetime import datetime, timedelta
+from repositories.reading_sessions import reading_sessions_repo
+from services.session_reaper import SessionReaper
+
+WORDS = [{'word': w, 'sentenceIndex': 0, 'correct': True} for w in ['The', 'cat']]
+
+
+def _start(api, book_id, words=None):
+    session_id = api.call('post', '/api/reading/start', json={'bookId': book_id})[1]['session']['sessionId']
+    if words:
+        api.call('post', '/api/reading/record-words', json={'sessionId': session_id, 'words': words})
+    return session_id
+
+
+def _idle(session_id, days=3):
+    reading_sessions_repo.update(session_id, {'lastActivity': datetime.now() - timedelta(days=days)})
+
+
+def test_reaper_closes_and_compacts(api, book_id):
+    empty = _start(api, book_id)
+    read = _start(api, book_id, WORDS)
+    recent = _start(api, book_id, WORDS)
+    _idle(empty)
+    _idle(read)
+
+    stats = SessionReaper(idle_hours=24).run()
+
+    assert stats['deleted'] == 1 and stats['closed'] == 1 and stats['wordsCompacted'] == 2
+    assert reading_sessions_repo.get(empty) is None
+    session = reading_sessions_repo.get(read)
+    assert session['abandoned'] and not session['active'] and session['wordsCompacted']
+    assert (session['wordCount'], session['correctCount'], session['attemptCount']) == (2, 2, 2)
+    assert list(reading_sessions_repo.words(read).list_documents()) == []
+    assert reading_sessions_repo.get(recent)['active']
+
+
+def test_reaper_finishes_interrupted_compaction(api, book_id, monkeypatch):
+    session_id = _start(api, book_id, WORDS)
+    _idle(session_id)
+    # Closed, but the word documents were never deleted
+    with monkeypatch.context() as patch:
+        patch.setattr(reading_sessions_repo, 'compact_words', lambda *args: None)
+        assert SessionReaper(idle_hours=24).run()['closed'] == 1
+    assert reading_sessions_repo.uncompacted(10)
+
+    SessionReaper(idle_hours=24).run()
+
+    assert reading_sessions_repo.uncompacted(10) == []
+    assert list(reading_sessions_repo.words(session_id).list_documents()) == []
+
+
+def test_session_changed_after_listing_is_skipped(api, book_id):
+    session_id = _start(api, book_id, WORDS[:1])
+    _idle(session_id)
+    listed = reading_sessions_repo.idle(datetime.now() - timedelta(hours=24), 10)[0]
+
+    # A word recorded between listing and closing
+    api.call('post', '/api/reading/record-words', json={'sessionId': session_id, 'words': WORDS[1:]})
+
+    outcome, words = reading_sessions_repo.close_abandoned(session_id, listed['lastActivity'], datetime.now())
+    assert (outcome, words) == (None, 0)
+    assert reading_sessions_repo.get(session_id)['active']
+
+
+def test_reaped_session_cannot_be_completed_or_synced(api, book_id):
+    payload = {'clientSessionId': 'c1', 'bookId': book_id, 'words': WORDS}
+    session_id = api.call('post', '/api/reading/sync', json=payload)[1]['sessionId']
+    _idle(session_id)
+    SessionReaper(idle_hours=24).run()
+
+    assert api.call('post', '/api/reading/complete', json={'sessionId': session_id})[0] == 409
+    assert api.call('post', '/api/reading/sync', json={**payload, 'completed': True})[0] == 409
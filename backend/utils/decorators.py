@@ -4,8 +4,9 @@ Authentication and authorization decorators
 """
 
 from functools import wraps
-from flask import request, jsonify
-from config.firebase_config import verify_token
+from flask import request, jsonify, g
+from utils.token_cache import token_cache
+from utils.user_context import UserDocument
 
 def require_auth(f):
     """
@@ -26,12 +27,16 @@ def require_auth(f):
         except IndexError:
             return jsonify({'error': 'Invalid authorization header format'}), 401
         
-        # Verify token
-        decoded_token = verify_token(token)
+        # Verify token (served from the in-process cache when seen recently)
+        decoded_token = token_cache.verify(token)
         
         if not decoded_token:
             return jsonify({'error': 'Invalid or expired token'}), 401
         
+        # Expose the token and a lazily loaded user document to the request
+        g.current_user = decoded_token
+        g.user_doc = UserDocument(decoded_token['uid'])
+        
         # Pass user info to the route function
         return f(current_user=decoded_token, *args, **kwargs)
     
@@ -0,0 +1,36 @@
+"""
+HTTP Conditional GET Helpers
+Strong ETags and 304 Not Modified responses for cacheable endpoints
+"""
+
+import hashlib
+import os
+import time
+from flask import request, make_response
+
+# Tags rotate at least this often, bounding staleness for catalog edits made
+# outside the backend (which don't bump the catalog version)
+ETAG_MAX_AGE = int(os.getenv('ETAG_MAX_AGE', 600))
+
+
+def make_etag(*parts):
+    """Strong ETag value from the parts that determine a response body"""
+    epoch = int(time.time() // ETAG_MAX_AGE) if ETAG_MAX_AGE > 0 else 0
+    raw = '|'.join(str(p) for p in parts + (epoch,))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:24]
+
+
+def not_modified(etag):
+    """A 304 response if the client already holds `etag`, otherwise None"""
+    if request.if_none_match and request.if_none_match.contains(etag):
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def with_etag(response, etag):
+    """Attach the ETag and require clients to revalidate before reuse"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
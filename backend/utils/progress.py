@@ -0,0 +1,68 @@
+"""
+Book Progress Helpers
+Per-book reading progress lives in the `bookProgress` map on the user
+document, keyed by bookId and written with field-path updates. Documents
+created before the map still carry a `progress` array; it is read but never
+rewritten, and a map entry for the same book takes precedence.
+"""
+
+from datetime import datetime
+
+# User fields to load whenever progress is needed (legacy array + map)
+PROGRESS_FIELDS = ('progress', 'bookProgress')
+
+
+def _entry(p):
+    return {
+        'bookId': p.get('bookId'),
+        'sentencesRead': p.get('sentencesRead', 0),
+        'totalSentences': p.get('totalSentences', 0)
+    }
+
+
+def read_progress(user_data):
+    """
+    Progress as the list the API has always returned: legacy entries in
+    their original order, then map entries from least to most recently updated
+    """
+    book_progress = user_data.get('bookProgress') or {}
+    entries = [_entry(p) for p in user_data.get('progress') or []
+               if str(p.get('bookId')) not in book_progress]
+
+    # Firestore returns aware datetimes; compare as epoch seconds
+    updated = sorted(book_progress.values(),
+                     key=lambda p: p['updatedAt'].timestamp() if p.get('updatedAt') else 0)
+    entries.extend(_entry(p) for p in updated)
+    return entries
+
+
+def find_progress(user_data, book_id):
+    """The progress entry for one book, or None"""
+    entry = (user_data.get('bookProgress') or {}).get(str(book_id))
+    if entry is not None:
+        return _entry(entry)
+    for p in user_data.get('progress') or []:
+        if str(p.get('bookId')) == str(book_id):
+            return _entry(p)
+    return None
+
+
+def is_completed(entry):
+    return entry.get('sentencesRead', 0) >= entry.get('totalSentences', 0)
+
+
+def progress_field_path(book_id):
+    from google.cloud.firestore_v1.field_path import FieldPath
+    return FieldPath('bookProgress', str(book_id)).to_api_repr()
+
+
+def progress_update(book_id, sentences_read, total_sentences):
+    """Field-path update that sets one book's entry without touching the rest"""
+    return {
+        progress_field_path(book_id): {
+            'bookId': book_id,
+            'sentencesRead': sentences_read,
+            'totalSentences': total_sentences,
+            'updatedAt': datetime.now()
+        }
+    }
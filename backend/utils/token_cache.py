@@ -0,0 +1,92 @@
+"""
+Verified Token Cache
+Keeps decoded Firebase ID tokens in memory so require_auth does not
+re-verify the same token on every request
+"""
+
+import hashlib
+import os
+import time
+from config.firebase_config import verify_token
+from utils.cache import LRUCache
+
+# Firebase ID tokens live for one hour; nothing we cache can outlive that
+MAX_TOKEN_LIFETIME = 3600
+
+
+class TokenCache:
+    """
+    Decoded tokens keyed by a SHA-256 of the raw token (the token itself is
+    never stored as a key). An entry expires at the token's `exp`, or after
+    `max_age` seconds so revocation is re-checked, whichever comes first.
+
+    invalidate_uid() also records a per-uid "revoked before" time, and tokens
+    issued (`iat`) earlier are rejected even when Firebase still accepts them,
+    so a logout holds in this worker without FIREBASE_CHECK_REVOKED. Those
+    times are kept for a token lifetime in a bounded LRU; revocation that must
+    hold across workers, or for more than `maxsize` users an hour, needs
+    FIREBASE_CHECK_REVOKED=true.
+    """
+
+    def __init__(self, maxsize=10000, max_age=300, check_revoked=False):
+        self.max_age = max_age
+        self.check_revoked = check_revoked
+        self._tokens = LRUCache(maxsize)
+        # uid -> time of last invalidation; only needs to outlive the tokens issued before it
+        self._invalidated = LRUCache(maxsize, ttl=max(max_age, MAX_TOKEN_LIFETIME))
+
+    @staticmethod
+    def _key(id_token):
+        return hashlib.sha256(id_token.encode('utf-8')).hexdigest()
+
+    def verify(self, id_token):
+        """
+        Return the decoded token, verifying with Firebase only on a cache miss.
+        Returns None for invalid, expired or revoked tokens, like verify_token.
+        """
+        key = self._key(id_token)
+        entry = self._tokens.get(key)
+
+        if entry is not None:
+            decoded, cached_at = entry
+            invalidated_at = self._invalidated.get(decoded['uid'], 0)
+            if cached_at > invalidated_at:
+                return decoded
+            self._tokens.pop(key)
+
+        decoded = verify_token(id_token, check_revoked=self.check_revoked)
+        if not decoded or self._revoked(decoded):
+            return None
+
+        now = time.time()
+        expires_at = min(decoded.get('exp', now + MAX_TOKEN_LIFETIME), now + self.max_age)
+        if expires_at > now:
+            self._tokens.set(key, (decoded, now), expires_at=expires_at)
+        return decoded
+
+    def _revoked(self, decoded):
+        """True if the token was issued before its user was last invalidated"""
+        invalidated_at = self._invalidated.get(decoded['uid'])
+        # `iat` has whole seconds; like Firebase's own check, a token issued
+        # in the same second as the invalidation is still accepted
+        return invalidated_at is not None and decoded.get('iat', 0) < int(invalidated_at)
+
+    def invalidate_uid(self, uid):
+        """
+        Drop every cached token for a user and reject the ones already issued
+        (logout, revocation, role change); the client signs in again for a
+        new token
+        """
+        # Strictly greater-than in verify(), so entries cached this instant are dropped too
+        self._invalidated.set(uid, time.time())
+
+    def stats(self):
+        return self._tokens.stats()
+
+
+# Global instance
+token_cache = TokenCache(
+    maxsize=int(os.getenv('TOKEN_CACHE_SIZE', 10000)),
+    max_age=int(os.getenv('TOKEN_CACHE_MAX_AGE', 300)),
+    check_revoked=os.getenv('FIREBASE_CHECK_REVOKED', 'false').lower() == 'true'
+)
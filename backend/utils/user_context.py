@@ -0,0 +1,143 @@
+"""
+Request-Scoped User Document
+Lazily loads users/<uid> at most once per request and remembers writes,
+so every handler shares one snapshot of the signed-in user
+"""
+
+from flask import g
+from repositories.users import users_repo
+
+
+def _is_transform(value):
+    """True for server-side transforms (Increment, ArrayUnion, SERVER_TIMESTAMP...)"""
+    return type(value).__module__.endswith('firestore_v1.transforms')
+
+
+class UserDocument:
+    """
+    Lazy view of the current user's Firestore document.
+
+    get('points', 'progress') fetches only those fields the first time they
+    are needed; get() with no fields fetches the whole document. Ask for
+    everything a handler needs in one call to keep it to one round trip.
+    Writes made through update()/set() are merged into the snapshot so a
+    handler can read back what it just wrote without another read.
+    """
+
+    def __init__(self, uid):
+        self.uid = uid
+        self._data = {}
+        self._loaded = set()  # top-level fields known to be current
+        self._full = False
+        self._exists = None
+
+    @property
+    def ref(self):
+        return users_repo.ref(self.uid)
+
+    def _fetch(self, fields=None):
+        if fields:
+            snapshot = self.ref.get(field_paths=list(fields))
+        else:
+            snapshot = self.ref.get()
+
+        self._exists = snapshot.exists
+        if not snapshot.exists:
+            return
+
+        data = snapshot.to_dict() or {}
+        if fields:
+            for field in fields:
+                if field in data:
+                    self._data[field] = data[field]
+                else:
+                    self._data.pop(field, None)
+                self._loaded.add(field)
+        else:
+            self._data = data
+            self._loaded = set(data)
+            self._full = True
+
+    @property
+    def exists(self):
+        if self._exists is None:
+            self._fetch()
+        return self._exists
+
+    def get(self, *fields):
+        """
+        Return a dict of the requested fields (all fields if none given),
+        or None if the user document does not exist
+        """
+        if fields:
+            missing = [f for f in fields if f not in self._loaded and not self._full]
+            if missing or self._exists is None:
+                self._fetch(missing or fields)
+        elif not self._full:
+            self._fetch()
+
+        if not self._exists:
+            return None
+
+        if fields:
+            return {f: self._data[f] for f in fields if f in self._data}
+        return dict(self._data)
+
+    def update(self, data):
+        """Update the document and mirror the write in the snapshot"""
+        self.ref.update(data)
+        self.mirror(data)
+
+    def mirror(self, data):
+        """Reflect an update committed elsewhere (e.g. in a transaction)"""
+        for path, value in data.items():
+            self._apply(path, value)
+
+    def set(self, data, merge=False):
+        """Create or overwrite the document and mirror the write in the snapshot"""
+        self.ref.set(data, merge=merge)
+        if not merge:
+            self._data = {}
+            self._loaded = set()
+            self._full = True
+        for path, value in data.items():
+            self._apply(path, value)
+        self._exists = True
+
+    def _apply(self, path, value):
+        # Imported here so loading this module doesn't pull in the Firestore client
+        from google.cloud.firestore_v1 import DELETE_FIELD
+        from google.cloud.firestore_v1.field_path import parse_field_path
+
+        parts = parse_field_path(path)
+        top = parts[0]
+
+        if _is_transform(value) and value is not DELETE_FIELD:
+            # Result is only known server-side; re-read the field if asked again
+            self._data.pop(top, None)
+            self._loaded.discard(top)
+            self._full = False
+            return
+
+        # Writes into a partially known map would leave a partial snapshot
+        if len(parts) > 1 and top not in self._loaded and not self._full:
+            return
+
+        target = self._data
+        for part in parts[:-1]:
+            nested = target.get(part)
+            if not isinstance(nested, dict):
+                nested = {}
+                target[part] = nested
+            target = nested
+
+        if value is DELETE_FIELD:
+            target.pop(parts[-1], None)
+        else:
+            target[parts[-1]] = value
+        self._loaded.add(top)
+
+
+def current_user_doc():
+    """The UserDocument that require_auth attached to this request"""
+    return g.user_doc